@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+from .cache import LocalTTLCache
+
+TOKEN_VERSION_KEY = 'token-version:{user_id}'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+user_cache = LocalTTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_SECONDS,
+)
+
+
+def get_cached_user(user_id):
+    """
+    Полный пользователь по id из кэша процесса. Записи сбрасываются
+    сигналами при сохранении и удалении пользователя.
+    """
+    return user_cache.get(
+        user_id,
+        lambda pk: User.objects.get(**{api_settings.USER_ID_FIELD: pk}),
+    )
+
+
+def get_token_version(user_id):
+    """
+    Текущая версия токенов пользователя из кэша; при промахе читается
+    из базы. Для удалённого пользователя возвращает None.
+    """
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is not None:
+            cache.set(key, version, settings.TOKEN_VERSION_CACHE_SECONDS)
+    return version
+
+
+def forget_token_version(user_id):
+    cache.delete(TOKEN_VERSION_KEY.format(user_id=user_id))
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью, флагами и версией токенов пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in User.token_claim_fields:
+            token[field] = getattr(user, field)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по RoleAccessToken без запроса к базе: пользователь
+    собирается из claims как экземпляр User, остальные поля которого
+    отложены и загружаются при обращении. Токен отзывается, когда
+    версия токенов пользователя расходится с версией в кэше; версия
+    хранится в кэше TOKEN_VERSION_CACHE_SECONDS, поэтому при локальном
+    кэше процесса отзыв доходит до других процессов за это время.
+    Для токенов без claims пользователь берётся из кэша процесса.
+    """
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return self.get_full_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            values = {
+                field: validated_token[field]
+                for field in User.token_claim_fields
+            }
+        except KeyError:
+            raise InvalidToken('Токен не содержит данных пользователя.')
+        if get_token_version(user_id) != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        values[api_settings.USER_ID_FIELD] = user_id
+        # from_db ждёт значения в порядке полей модели.
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        user = User.from_db(
+            DEFAULT_DB_ALIAS, fields, [values[field] for field in fields]
+        )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return user
+
+    def get_full_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит данных пользователя.')
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,309 @@
+import copy
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+VERSION_KEY = 'version:{label}'
+MODIFIED_KEY = 'modified:{label}'
+STATS_KEY = 'stats:{name}:{event}'
+STATS_EVENTS = ('hits', 'misses', 'stale')
+
+# Имена кэшей, для которых ведётся статистика попаданий.
+stats_names = set()
+
+
+def _version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def _modified_key(model):
+    return MODIFIED_KEY.format(label=model._meta.label_lower)
+
+
+def _initial_version():
+    # Версия после вытеснения ключа не должна совпасть с прежней.
+    return time.time_ns()
+
+
+def get_model_state(*models):
+    """
+    Возвращает версии моделей и время последнего изменения любой из них
+    одним обращением к кэшу. Если время неизвестно (ключ вытеснен),
+    модель считается изменённой сейчас.
+    """
+    version_keys = [_version_key(model) for model in models]
+    modified_keys = [_modified_key(model) for model in models]
+    values = cache.get_many(version_keys + modified_keys)
+    for key in version_keys:
+        if key not in values:
+            cache.add(key, _initial_version(), timeout=None)
+            values[key] = cache.get(key)
+    modified = []
+    for key in modified_keys:
+        if key not in values:
+            cache.add(key, time.time(), timeout=None)
+            values[key] = cache.get(key)
+        modified.append(values[key])
+    return tuple(values[key] for key in version_keys), max(modified)
+
+
+def get_model_versions(*models):
+    """Возвращает текущие версии моделей одним обращением к кэшу."""
+    return get_model_state(*models)[0]
+
+
+def bump_model_version(model):
+    """Инвалидирует все закэшированные данные модели за O(1)."""
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+    cache.set(_modified_key(model), time.time(), timeout=None)
+
+
+def request_cache_key(prefix, request, models, ignored_params=(),
+                      versions=None):
+    """
+    Строит ключ кэша из хоста, пути, параметров запроса и версий моделей.
+    Хост нужен, потому что ссылки пагинации в ответе абсолютные.
+    Параметры из `ignored_params` в ключ не попадают. Уже прочитанные
+    версии можно передать в `versions`.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        if name not in ignored_params
+        for value in values
+    )
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.path}?{urlencode(params)}'.encode()
+    ).hexdigest()
+    if versions is None:
+        versions = get_model_versions(*models)
+    versions = '.'.join(str(version) for version in versions)
+    return f'{prefix}:{versions}:{digest}'
+
+
+def record_cache_event(name, event):
+    key = STATS_KEY.format(name=name, event=event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """Счётчики попаданий и промахов по всем зарегистрированным кэшам."""
+    keys = {
+        (name, event): STATS_KEY.format(name=name, event=event)
+        for name in stats_names
+        for event in STATS_EVENTS
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for (name, event), key in sorted(keys.items()):
+        stats.setdefault(name, {})[event] = values.get(key, 0)
+    stats['local'] = response_cache.local_stats()
+    return stats
+
+
+Entry = namedtuple('Entry', 'value fresh_until stale_until')
+
+
+class TieredCache:
+    """
+    Двухуровневый кэш: LRU в памяти процесса, ограниченный по байтам,
+    поверх общего бэкенда Django.
+
+    Значение свежее до fresh_until, после чего ещё stale_seconds
+    отдаётся устаревшим: пересчитывает его один вызывающий, взявший
+    блокировку, а остальные получают старое значение сразу. Если значения
+    нет совсем, пересчёт тоже выполняет один вызывающий (single-flight),
+    а остальные ждут его результата. Блокировка берётся и в процессе,
+    и в общем кэше через cache.add, чтобы не пересчитывать значение
+    одновременно в нескольких воркерах.
+    """
+
+    lock_poll_seconds = 0.02
+
+    def __init__(self, max_bytes, fresh_seconds, stale_seconds,
+                 lock_seconds):
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.lock_seconds = lock_seconds
+        self._local = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def local_stats(self):
+        return {'entries': len(self._local), 'bytes': self._local_bytes}
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
+
+    def _local_get(self, key):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            self._local.move_to_end(key)
+            return item[0]
+
+    def _local_set(self, key, entry):
+        size = len(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._local.pop(key, None)
+            if old is not None:
+                self._local_bytes -= old[1]
+            self._local[key] = (entry, size)
+            self._local_bytes += size
+            while self._local_bytes > self.max_bytes:
+                _, (_, evicted) = self._local.popitem(last=False)
+                self._local_bytes -= evicted
+
+    def _lookup(self, key):
+        entry = self._local_get(key)
+        if entry is None or entry.fresh_until <= time.time():
+            shared = cache.get(key)
+            if shared is not None and (
+                entry is None or shared.fresh_until > entry.fresh_until
+            ):
+                entry = shared
+                self._local_set(key, entry)
+        return entry
+
+    def _acquire(self, key):
+        with self._lock:
+            if key in self._inflight:
+                return None
+            event = self._inflight[key] = threading.Event()
+        if cache.add(f'lock:{key}', 1, timeout=self.lock_seconds):
+            return event
+        self._release(key, event, shared=False)
+        return None
+
+    def _release(self, key, event, shared=True):
+        if shared:
+            cache.delete(f'lock:{key}')
+        with self._lock:
+            self._inflight.pop(key, None)
+        event.set()
+
+    def _store(self, key, compute, fresh_seconds):
+        now = time.time()
+        fresh_seconds = fresh_seconds or self.fresh_seconds
+        entry = Entry(
+            compute(),
+            now + fresh_seconds,
+            now + fresh_seconds + self.stale_seconds,
+        )
+        cache.set(key, entry, fresh_seconds + self.stale_seconds)
+        self._local_set(key, entry)
+        return entry.value
+
+    def _wait(self, key):
+        """Ждёт значение, которое пересчитывает другой вызывающий."""
+        with self._lock:
+            event = self._inflight.get(key)
+        deadline = time.time() + self.lock_seconds
+        while time.time() < deadline:
+            if event is not None:
+                event.wait(deadline - time.time())
+            else:
+                time.sleep(self.lock_poll_seconds)
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def get_or_set(self, key, compute, fresh_seconds=None):
+        """
+        Возвращает пару (значение, событие), где событие — одно из
+        'hits', 'stale' или 'misses'. Исключения compute не кэшируются.
+        """
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None and entry.fresh_until > now:
+            return entry.value, 'hits'
+        usable = entry is not None and entry.stale_until > now
+        event = self._acquire(key)
+        if event is None:
+            if usable:
+                return entry.value, 'stale'
+            entry = self._wait(key)
+            if entry is not None:
+                return entry.value, 'hits'
+            return self._store(key, compute, fresh_seconds), 'misses'
+        try:
+            return self._store(key, compute, fresh_seconds), 'misses'
+        finally:
+            self._release(key, event)
+
+
+class LocalTTLCache:
+    """
+    LRU-кэш объектов в памяти процесса, ограниченный числом записей,
+    с временем жизни ttl секунд. Запись удаляется вызовом invalidate,
+    а изменения из других процессов видны не позже чем через ttl.
+    Вызывающим отдаются копии, чтобы их изменения не попадали в кэш.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        # Растёт при каждой инвалидации: значение, загруженное до неё,
+        # не сохраняется.
+        self._generation = 0
+
+    def get(self, key, load):
+        """Значение по ключу; при промахе вызывает load(key)."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[1] > now:
+                self._items.move_to_end(key)
+                return copy.copy(item[0])
+            generation = self._generation
+        value = load(key)
+        with self._lock:
+            if generation != self._generation:
+                return copy.copy(value)
+            self._items[key] = (value, now + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return copy.copy(value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+
+response_cache = TieredCache(
+    max_bytes=settings.RESPONSE_CACHE_LOCAL_MAX_BYTES,
+    fresh_seconds=settings.RESPONSE_CACHE_FRESH_SECONDS,
+    stale_seconds=settings.RESPONSE_CACHE_STALE_SECONDS,
+    lock_seconds=settings.RESPONSE_CACHE_LOCK_SECONDS,
+)
@@ -0,0 +1,11 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = (
+        'Объект был изменён другим запросом. '
+        'Получите актуальную версию и повторите изменение.'
+    )
+    default_code = 'precondition_failed'
@@ -1,14 +1,33 @@
+from django.db.models import Exists, OuterRef, Subquery
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
 
-from reviews.models import Title
+from reviews.models import Category, Title
+from reviews.search import build_query, search
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Список значений через запятую."""
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
+    """
+    Фильтры списка произведений. Жанры и категории принимают несколько
+    слагов через запятую; `genre_mode=all` требует все жанры сразу,
+    по умолчанию достаточно любого. Условия на жанры строятся
+    подзапросами EXISTS по промежуточной таблице, поэтому строки
+    произведений не размножаются и DISTINCT не нужен.
+    """
+
+    ANY = 'any'
+    ALL = 'all'
+
+    category = CharInFilter(method='filter_category')
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=((ANY, 'любой из жанров'), (ALL, 'все жанры')),
+        method='filter_nothing',
     )
     name = filters.CharFilter(
         field_name='name',
@@ -16,7 +35,79 @@ class TitleFilter(filters.FilterSet):
     year = filters.NumberFilter(
         field_name='year',
     )
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    rating_max = filters.NumberFilter(field_name='rating', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year', )
+
+    def filter_nothing(self, queryset, name, value):
+        # genre_mode только уточняет фильтр genre.
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category_id__in=Subquery(
+            Category.objects.filter(slug__in=value).values('id')
+        ))
+
+    def filter_genre(self, queryset, name, value):
+        links = Title.genre.through.objects.filter(title_id=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_mode') != self.ALL:
+            return queryset.filter(Exists(links.filter(genre__slug__in=value)))
+        for slug in set(value):
+            queryset = queryset.filter(Exists(links.filter(genre__slug=slug)))
+        return queryset
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по параметру `search` через индекс FTS5.
+    Найденные строки упорядочены по релевантности, если запрос не
+    задаёт сортировку явно.
+    """
+
+    search_param = 'search'
+
+    def ranks_results(self, request):
+        """
+        Упорядочен ли ответ по релевантности. Курсор такой порядок не
+        сохраняет, поэтому пагинация листает такие ответы постранично.
+        """
+        text = request.query_params.get(self.search_param)
+        return (
+            text is not None and build_query(text) is not None
+            and not request.query_params.get(api_settings.ORDERING_PARAM)
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param)
+        if text is None:
+            return queryset
+        return search(queryset, text)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка по одному полю из `ordering_fields` с добавлением `id`
+    в том же направлении: порядок однозначен, а пара (поле, id) совпадает
+    с составным индексом и ключом курсорной пагинации. Без параметра
+    порядок queryset не меняется.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return None
+        ordering = self.remove_invalid_fields(
+            queryset, [term.strip() for term in params.split(',')],
+            view, request,
+        )
+        if not ordering:
+            return None
+        first = ordering[0]
+        if first.lstrip('-') == 'id':
+            return [first]
+        return [first, '-id' if first.startswith('-') else 'id']
@@ -1,8 +1,20 @@
+import hashlib
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
 from rest_framework import mixins, viewsets
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from .cache import (get_model_state, record_cache_event, request_cache_key,
+                    response_cache, stats_names)
+from .exceptions import PreconditionFailed
+
 
 class CreateViewDeleteMixinSet(CreateModelMixin,
                                ListModelMixin,
@@ -13,3 +25,170 @@ class CreateViewDeleteMixinSet(CreateModelMixin,
 
 class CreateViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     pass
+
+
+class VersionedResponseCacheMixin:
+    """
+    Кэширует ответы действий из `cache_actions` целиком в двухуровневом
+    кэше, включая параметры поиска, фильтров и страницы.
+
+    В ключ входят версии моделей из `cache_models` (по умолчанию модель
+    queryset), которые сигналы меняют при каждом изменении строк, поэтому
+    устаревший ответ становится недоступен сразу, без перебора ключей.
+    Из того же ключа строится ETag, а из времени изменения моделей —
+    Last-Modified, так что If-None-Match и If-Modified-Since получают 304
+    без сериализации. Попадания и промахи считаются под именем
+    `cache_name`.
+    """
+
+    cache_name = None
+    cache_actions = ('list',)
+    conditional_actions = ('list',)
+    cache_models = None
+    cache_fresh_seconds = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_name:
+            stats_names.add(cls.cache_name)
+
+    def get_cache_models(self):
+        return self.cache_models or (self.get_queryset().model,)
+
+    def dispatch(self, request, *args, **kwargs):
+        # as_view() уже связал метод GET с действием: подменяем обработчик,
+        # чтобы кэш проверялся после аутентификации и прав доступа.
+        self.cache_status = None
+        action = getattr(self, 'action_map', {}).get('get')
+        if action in self.cache_actions and hasattr(self, 'get'):
+            handler = self.get
+            self.get = lambda *args, **kwargs: self.cached_response(
+                handler, *args, **kwargs
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.cache_status:
+            response['X-Cache'] = self.cache_status
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_etag(self, key, request):
+        # Представление зависит и от рендерера, поэтому учитываем Accept.
+        accept = request.META.get('HTTP_ACCEPT', '')
+        return '"{}"'.format(
+            hashlib.md5(f'{key}:{accept}'.encode()).hexdigest()
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        versions, modified = get_model_state(*self.get_cache_models())
+        key = request_cache_key(
+            f'response:{self.cache_name}:{self.action}',
+            request,
+            self.get_cache_models(),
+            versions=versions,
+        )
+        if self.action not in self.conditional_actions:
+            return self.get_response(handler, key, request, *args, **kwargs)
+        etag = self.get_etag(key, request)
+        # If-Modified-Since точен до секунды, а текущая секунда ещё не
+        # кончилась: объявленное время не позже прошлой секунды, иначе
+        # изменение в той же секунде получило бы 304 со старыми данными.
+        modified = int(modified)
+        last_modified = http_date(min(modified, int(time.time()) - 1))
+        # Условный запрос отвечаем 304 до любой работы с queryset.
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if not_modified is not None:
+            self.cache_status = 'NOT-MODIFIED'
+            response = not_modified
+        else:
+            response = self.get_response(handler, key, request, *args,
+                                         **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = last_modified
+        return response
+
+    def get_response(self, handler, key, request, *args, **kwargs):
+        computed = []
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            computed.append(response)
+            # ETag объекта, выставленный обработчиком, храним вместе с телом.
+            return response.data, response.get('ETag')
+
+        (data, etag), event = response_cache.get_or_set(
+            key, compute, self.cache_fresh_seconds
+        )
+        record_cache_event(self.cache_name, event)
+        self.cache_status = 'MISS' if computed else (
+            'HIT' if event == 'hits' else 'STALE'
+        )
+        if computed:
+            return computed[0]
+        return Response(data, headers={'ETag': etag} if etag else None)
+
+
+class OptimisticConcurrencyMixin:
+    """
+    Оптимистичная блокировка для изменения и удаления объекта.
+
+    Ответы с объектом несут ETag с номером его версии. Если запрос
+    PATCH/PUT/DELETE передаёт If-Match, версия сверяется с текущей и
+    захватывается условным UPDATE ... WHERE version = N. Если объект уже
+    изменён другим запросом, возвращается 412, без блокировки строк
+    на время работы запроса.
+    """
+
+    def get_object(self):
+        obj = super().get_object()
+        self.etag_object = obj
+        return obj
+
+    def get_object_etag(self, obj):
+        return f'"{obj._meta.model_name}-{obj.pk}-v{obj.version}"'
+
+    def check_if_match(self, instance):
+        """
+        Сверяет If-Match с версией объекта. Возвращает True, если запрос
+        передал предусловие и версию нужно захватить.
+        """
+        header = self.request.META.get('HTTP_IF_MATCH')
+        if header is None:
+            return False
+        etags = parse_etags(header)
+        if '*' not in etags and self.get_object_etag(instance) not in etags:
+            raise PreconditionFailed()
+        return True
+
+    def claim_version(self, instance):
+        """Сравнивает и увеличивает версию одним условным UPDATE."""
+        claimed = type(instance).objects.filter(
+            pk=instance.pk, version=instance.version
+        ).update(version=F('version') + 1)
+        if not claimed:
+            raise PreconditionFailed()
+
+    def perform_update(self, serializer):
+        if not self.check_if_match(serializer.instance):
+            return super().perform_update(serializer)
+        with transaction.atomic():
+            self.claim_version(serializer.instance)
+            # save() увеличит version экземпляра до захваченного значения.
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        if not self.check_if_match(instance):
+            return super().perform_destroy(instance)
+        with transaction.atomic():
+            self.claim_version(instance)
+            super().perform_destroy(instance)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        obj = getattr(self, 'etag_object', None)
+        if (obj is not None and obj.pk is not None
+                and 200 <= response.status_code < 300):
+            response['ETag'] = self.get_object_etag(obj)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,5 +1,323 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Func, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import request_cache_key
+
+
+class RowValue(Func):
+    """Кортеж `(a, b, ...)` для построчного сравнения в WHERE."""
+
+    function = ''
+    output_field = Field()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу: курсор хранит значения всех полей сортировки
+    последней строки страницы, а следующая страница выбирается условием
+    `(поле, id) > (значение, id)`. Такое условие использует составной
+    индекс по полям сортировки, поэтому глубина страницы не влияет на
+    время ответа, а повторы значений не требуют OFFSET.
+
+    Все поля сортируются в одном направлении; последнее должно быть
+    уникальным. Первое поле может допускать NULL: строки с NULL
+    (в SQL они меньше любых значений) выбираются отдельным запросом.
+    """
+
+    page_size = 10
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        position, self.reverse = self.decode_cursor(request)
+        self.has_cursor = position is not None
+        rows = []
+        for segment in self.get_segments(queryset, position):
+            rows.extend(segment[:self.page_size + 1 - len(rows)])
+            if len(rows) > self.page_size:
+                break
+        self.has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+        self.page = rows
+        return rows
+
+    def get_segments(self, queryset, position):
+        """
+        Части выборки в порядке обхода, начиная с позиции курсора.
+        Обход назад (ссылка previous) идёт в обратном порядке.
+        """
+        descending = self.descending != self.reverse
+        direction = '-' if descending else ''
+        queryset = queryset.order_by(
+            *(direction + field.name for field in self.fields)
+        )
+        leading = self.fields[0]
+        # Часть выборки, её поля ключа и признак строк с NULL.
+        parts = [(queryset, self.fields, False)]
+        if leading.null:
+            parts = [
+                (queryset.filter(**{f'{leading.name}__isnull': False}),
+                 self.fields, False),
+                (queryset.filter(**{f'{leading.name}__isnull': True}),
+                 self.fields[1:], True),
+            ]
+            if not descending:
+                # NULL меньше любого значения: по возрастанию они первые.
+                parts.reverse()
+        if position is None:
+            return [part for part, _, _ in parts]
+        segments = []
+        for part, fields, nulls in parts:
+            if segments:
+                segments.append(part)
+            elif nulls == (position[0] is None):
+                values = position[len(position) - len(fields):]
+                segments.append(
+                    self.after(part, fields, values, descending)
+                )
+        return segments
+
+    def after(self, queryset, fields, values, descending):
+        """Строки после позиции values в порядке обхода."""
+        lookup = 'lt' if descending else 'gt'
+        if len(fields) == 1:
+            return queryset.filter(
+                **{f'{fields[0].name}__{lookup}': values[0]}
+            )
+        return queryset.alias(
+            keyset_position=RowValue(*(field.name for field in fields))
+        ).filter(**{f'keyset_position__{lookup}': RowValue(*(
+            Value(value, output_field=field)
+            for field, value in zip(fields, values)
+        ))})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode()).decode())
+            if len(data['p']) != len(self.fields) or None in data['p'][1:]:
+                raise ValueError
+            position = [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, data['p'])
+            ]
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        # value_to_string сохраняет микросекунды дат, в отличие от JSON.
+        position = [
+            None if getattr(instance, field.attname) is None
+            else field.value_to_string(instance)
+            for field in self.fields
+        ]
+        data = json.dumps({'p': position, 'r': int(reverse)})
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            b64encode(data.encode()).decode(),
+        )
+
+    def get_next_link(self):
+        has_next = self.has_cursor if self.reverse else self.has_more
+        if not has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        has_previous = self.has_more if self.reverse else self.has_cursor
+        if not has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
 
 
 class PagePagination(PageNumberPagination):
+    """
+    Постраничная пагинация с включаемым режимом курсора.
+
+    Режим курсора выбирается параметром `?pagination=cursor`, наличием
+    `cursor` в запросе или атрибутом вью `pagination_mode = 'cursor'`.
+    Порядок для курсора берётся из фильтра сортировки вью, если он задан
+    в запросе, иначе из атрибута вью `cursor_ordering`. Ответы,
+    упорядоченные поиском по релевантности, листаются постранично:
+    курсор пересортировал бы их.
+    """
+
     page_size = 10
+    cursor_mode = 'cursor'
+    mode_query_param = 'pagination'
+    cursor_query_param = KeysetPagination.cursor_query_param
+    default_cursor_ordering = ('id',)
+
+    keyset_paginator = None
+
+    def use_cursor(self, request, view):
+        for backend in getattr(view, 'filter_backends', ()):
+            ranks_results = getattr(backend(), 'ranks_results', None)
+            if ranks_results is not None and ranks_results(request):
+                return False
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_query_param in request.query_params
+            or getattr(view, 'pagination_mode', None) == self.cursor_mode
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request, view):
+            self.keyset_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset_paginator = KeysetPagination(
+            ordering=self.get_cursor_ordering(request, queryset, view),
+            page_size=self.get_page_size(request),
+        )
+        return self.keyset_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_cursor_ordering(self, request, queryset, view):
+        for backend in getattr(view, 'filter_backends', ()):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return ordering
+        return getattr(view, 'cursor_ordering', self.default_cursor_ordering)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CachedCountPagination(PagePagination):
+    """
+    Постраничная пагинация без COUNT(*) на каждый запрос.
+
+    Наличие следующей страницы определяется выборкой page_size + 1 строк,
+    а `count` берётся из кэша с коротким TTL. Ключ кэша строится из
+    параметров фильтрации и версий моделей из `view.count_cache_models`
+    (по умолчанию модель queryset), поэтому изменение строк сразу делает
+    закэшированное значение недоступным.
+    """
+
+    count_cache_timeout = 30
+    count_cache_prefix = 'page-count'
+    # Сортировка не меняет число строк: счётчик общий для всех порядков.
+    ordering_query_param = api_settings.ORDERING_PARAM
+    display_page_controls = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset_paginator = None
+        self.request = request
+        self.queryset = queryset
+        self.count_cache_key = request_cache_key(
+            self.count_cache_prefix,
+            request,
+            getattr(view, 'count_cache_models', (queryset.model,)),
+            ignored_params=(self.page_query_param,
+                            self.page_size_query_param,
+                            self.ordering_query_param),
+        )
+        self.page_size = self.get_page_size(request)
+        self.page_number = self.get_page_number_value(request)
+        offset = (self.page_number - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if not rows and self.page_number != 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number, message='Пустая страница.'
+            ))
+        if not self.has_next:
+            # Последняя страница: точное число известно без запроса.
+            cache.set(self.count_cache_key, offset + len(rows),
+                      self.count_cache_timeout)
+        return rows
+
+    def get_page_number_value(self, request):
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            count = self.get_count()
+            return max((count + self.page_size - 1) // self.page_size, 1)
+        try:
+            page_number = int(page_number)
+        except (TypeError, ValueError):
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='Неверный номер страницы.'
+            ))
+        return page_number
+
+    def get_count(self):
+        count = cache.get(self.count_cache_key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(self.count_cache_key, count, self.count_cache_timeout)
+        return count
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1,
+        )
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.get_count()),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
@@ -5,6 +5,12 @@ from reviews.models import Category, Comments, Genre, Review, Title, User
 from reviews.validators import UsernameValidator
 
 
+def get_expanded_fields(request):
+    if request is None:
+        return set()
+    return set(request.query_params.get('expand', '').split(','))
+
+
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug',)
@@ -25,7 +31,7 @@ class TitleReadSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField()
 
     class Meta:
-        fields = ('id', 'name', 'year', 'rating',
+        fields = ('id', 'name', 'year', 'rating', 'review_count',
                   'description', 'genre', 'category')
         model = Title
 
@@ -62,25 +68,10 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate(self, value):
-        super().validate(value)
-
-        if self.context['request'].method != 'POST':
-            return value
-
-        user = self.context['request'].user
-        title_id = (
-            self.context['request'].parser_context['kwargs']['title_id']
-        )
-        if Review.objects.filter(author=user, title_id=title_id).exists():
-            raise serializers.ValidationError(
-                'Нельзя оставить повторный отзыв'
-            )
-        return value
-
     class Meta:
         model = Review
-        fields = ('id', 'author', 'title', 'text', 'score', 'pub_date')
+        fields = ('id', 'author', 'title', 'text', 'score', 'pub_date',
+                  'comment_count')
 
 
 class CommentsSerializer(serializers.ModelSerializer):
@@ -97,6 +88,16 @@ class CommentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comments
         fields = ('id', 'author', 'review', 'text', 'pub_date')
+        expandable_fields = ('review',)
+
+    def get_fields(self):
+        """Текст отзыва отдаётся только по запросу `?expand=review`."""
+        fields = super().get_fields()
+        expand = get_expanded_fields(self.context.get('request'))
+        for name in self.Meta.expandable_fields:
+            if name not in expand:
+                fields.pop(name)
+        return fields
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from reviews.models import Category, Comments, Genre, Review, Title, User
+from .authentication import forget_token_version, user_cache
+from .cache import bump_model_version
+from .suggest import slug_payload, suggester, title_payload, user_payload
+
+VERSIONED_MODELS = (Category, Comments, Genre, Review, Title)
+
+
+def bump_on_commit(model):
+    """Меняет версию после коммита, чтобы не закэшировать старые данные."""
+    transaction.on_commit(lambda: bump_model_version(model))
+
+
+def model_changed(sender, **kwargs):
+    bump_on_commit(sender)
+
+
+def title_genre_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_on_commit(Title)
+        transaction.on_commit(lambda: suggester.invalidate('genres'))
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(
+        model_changed, sender=model, dispatch_uid=f'version_{model.__name__}'
+    )
+    post_delete.connect(
+        model_changed, sender=model, dispatch_uid=f'version_{model.__name__}'
+    )
+m2m_changed.connect(title_genre_changed, sender=Title.genre.through)
+
+
+def user_saved_version(sender, created, update_fields, **kwargs):
+    # В закэшированных ответах пользователь виден только как автор по
+    # username; выдача кодов подтверждения версию не меняет.
+    if not created and (update_fields is None or 'username' in update_fields):
+        bump_on_commit(User)
+
+
+post_save.connect(
+    user_saved_version, sender=User, dispatch_uid='version_User'
+)
+post_delete.connect(model_changed, sender=User, dispatch_uid='version_User')
+
+
+def suggest_on_commit(kind, method, *args):
+    transaction.on_commit(lambda: suggester.update(kind, method, *args))
+
+
+def title_saved(sender, instance, **kwargs):
+    suggest_on_commit(
+        'titles', 'add', instance.pk, instance.name,
+        title_payload(instance.pk, instance.name),
+    )
+    # Популярность жанров и категорий — число произведений в них;
+    # эти индексы малы и перестраиваются целиком.
+    transaction.on_commit(
+        lambda: suggester.invalidate('genres', 'categories')
+    )
+
+
+def title_deleted(sender, instance, **kwargs):
+    suggest_on_commit('titles', 'remove', instance.pk)
+    transaction.on_commit(
+        lambda: suggester.invalidate('genres', 'categories')
+    )
+
+
+def slugged_saved(sender, instance, **kwargs):
+    suggest_on_commit(
+        SUGGEST_KINDS[sender], 'add', instance.pk, instance.name,
+        slug_payload(instance.slug, instance.name),
+    )
+
+
+def slugged_deleted(sender, instance, **kwargs):
+    suggest_on_commit(SUGGEST_KINDS[sender], 'remove', instance.pk)
+
+
+def user_saved(sender, instance, **kwargs):
+    suggest_on_commit(
+        'users', 'add', instance.pk, instance.username,
+        user_payload(instance.username),
+    )
+
+
+def user_deleted(sender, instance, **kwargs):
+    suggest_on_commit('users', 'remove', instance.pk)
+
+
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        suggest_on_commit('titles', 'adjust', instance.title_id, 1)
+        suggest_on_commit('users', 'adjust', instance.author_id, 1)
+
+
+def review_deleted(sender, instance, **kwargs):
+    suggest_on_commit('titles', 'adjust', instance.title_id, -1)
+    suggest_on_commit('users', 'adjust', instance.author_id, -1)
+
+
+SUGGEST_KINDS = {Genre: 'genres', Category: 'categories'}
+SUGGEST_RECEIVERS = (
+    (Title, title_saved, title_deleted),
+    (Genre, slugged_saved, slugged_deleted),
+    (Category, slugged_saved, slugged_deleted),
+    (User, user_saved, user_deleted),
+    (Review, review_saved, review_deleted),
+)
+for model, saved, deleted in SUGGEST_RECEIVERS:
+    post_save.connect(
+        saved, sender=model, dispatch_uid=f'suggest_{model.__name__}'
+    )
+    post_delete.connect(
+        deleted, sender=model, dispatch_uid=f'suggest_{model.__name__}'
+    )
+
+
+def user_changed(sender, instance, **kwargs):
+    # Версию токенов и пользователя следующий запрос с его токеном
+    # прочитает из базы. После удаления pk обнуляется, поэтому id
+    # запоминается сразу.
+    user_id = instance.pk
+
+    def forget():
+        forget_token_version(user_id)
+        user_cache.invalidate(user_id)
+
+    transaction.on_commit(forget)
+
+
+post_save.connect(user_changed, sender=User, dispatch_uid='auth_User')
+post_delete.connect(user_changed, sender=User, dispatch_uid='auth_User')
@@ -0,0 +1,327 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from reviews.models import Category, Genre, Title, User
+from reviews.search import WORD_RE, normalize
+
+# Сколько слов названия индексируется: подсказка ищет и с середины.
+MAX_WORDS = 8
+
+
+def index_keys(label):
+    """
+    Ключи для названия: оно само и все его хвосты с начала слова,
+    чтобы «тум» находило «Ёжик в тумане».
+    """
+    words = WORD_RE.findall(normalize(label))[:MAX_WORDS]
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+def normalize_prefix(prefix):
+    return ' '.join(WORD_RE.findall(normalize(prefix)))
+
+
+# Ранг пустого листа: больше ранга любого элемента.
+EMPTY = (float('inf'),)
+
+
+class PrefixIndex:
+    """
+    Ключи элементов в отсортированном массиве и дерево отрезков над ним,
+    где каждый узел хранит лучший ранг своего отрезка (популярность по
+    убыванию, затем название). Ключи префикса занимают непрерывный
+    диапазон массива, и первые k элементов диапазона извлекаются обходом
+    дерева с кучей за O(k log n), сколько бы ключей ни начиналось с
+    префикса.
+
+    Индекс строится одной сортировкой. Изменения после построения не
+    сдвигают массив: удалённые ключи становятся пустыми листьями, а
+    новые копятся в коротком отсортированном хвосте `pending`; когда он
+    превышает `max_pending`, индекс просит перестройки. Результаты
+    запоминаются в LRU на `max_results` префиксов до первого изменения.
+    """
+
+    max_pending = 1024
+    max_results = 1024
+
+    def __init__(self, entries=()):
+        self.items = {}
+        pairs = []
+        for item_id, label, payload, popularity in entries:
+            self.items[item_id] = (label, popularity, payload)
+            pairs.extend((key, item_id) for key in index_keys(label))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.positions = {}
+        for position, (_, item_id) in enumerate(pairs):
+            self.positions.setdefault(item_id, []).append(position)
+        self.size = 1 << max(len(pairs) - 1, 0).bit_length()
+        ranks = {item_id: self.rank(item_id) for item_id in self.items}
+        tree = [EMPTY] * self.size
+        tree.extend(ranks[item_id] for _, item_id in pairs)
+        tree.extend([EMPTY] * (self.size - len(pairs)))
+        for node in range(self.size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+        self.pending = []
+        self.results = OrderedDict()
+
+    @property
+    def needs_rebuild(self):
+        return len(self.pending) > self.max_pending
+
+    def rank(self, item_id):
+        label, popularity, _ = self.items[item_id]
+        return (-popularity, label, item_id)
+
+    def update_leaves(self, item_id):
+        """Переносит ранг элемента в листья его ключей и их предков."""
+        value = self.rank(item_id) if item_id in self.items else EMPTY
+        for position in self.positions.get(item_id, ()):
+            node = self.size + position
+            self.tree[node] = value
+            node //= 2
+            while node:
+                self.tree[node] = min(
+                    self.tree[2 * node], self.tree[2 * node + 1]
+                )
+                node //= 2
+
+    def add(self, item_id, label, payload, popularity=None):
+        """Добавляет или переименовывает элемент, сохраняя популярность."""
+        old = self.items.get(item_id)
+        if popularity is None:
+            popularity = old[1] if old else 0
+        if old is not None and old[0] == label:
+            self.items[item_id] = (label, popularity, payload)
+            self.update_leaves(item_id)
+        else:
+            self.remove(item_id)
+            self.items[item_id] = (label, popularity, payload)
+            for key in index_keys(label):
+                insort(self.pending, (key, item_id))
+        self.results.clear()
+
+    def remove(self, item_id):
+        if self.items.pop(item_id, None) is None:
+            return
+        self.update_leaves(item_id)
+        self.positions.pop(item_id, None)
+        self.pending = [pair for pair in self.pending if pair[1] != item_id]
+        self.results.clear()
+
+    def adjust(self, item_id, delta):
+        item = self.items.get(item_id)
+        if item is not None:
+            label, popularity, payload = item
+            self.items[item_id] = (label, popularity + delta, payload)
+            self.update_leaves(item_id)
+            self.results.clear()
+
+    def top(self, low, high, limit):
+        """Id первых по рангу элементов среди ключей [low, high)."""
+        heap = []
+        low += self.size
+        high += self.size
+        while low < high:
+            if low & 1:
+                heappush(heap, (self.tree[low], low))
+                low += 1
+            if high & 1:
+                high -= 1
+                heappush(heap, (self.tree[high], high))
+            low //= 2
+            high //= 2
+        found = []
+        while heap and len(found) < limit:
+            value, node = heappop(heap)
+            if value == EMPTY:
+                break
+            if node >= self.size:
+                # У названия бывает несколько ключей с одним префиксом.
+                if value[2] not in found:
+                    found.append(value[2])
+                continue
+            heappush(heap, (self.tree[2 * node], 2 * node))
+            heappush(heap, (self.tree[2 * node + 1], 2 * node + 1))
+        return found
+
+    def search(self, prefix, limit):
+        cached = self.results.get((prefix, limit))
+        if cached is not None:
+            self.results.move_to_end((prefix, limit))
+            return cached
+        end = prefix + '\U0010ffff'
+        found = set(self.top(
+            bisect_left(self.keys, prefix), bisect_left(self.keys, end),
+            limit,
+        ))
+        position = bisect_left(self.pending, (prefix,))
+        while (position < len(self.pending)
+               and self.pending[position][0] < end):
+            found.add(self.pending[position][1])
+            position += 1
+        ranked = sorted(found, key=self.rank)[:limit]
+        result = self.results[(prefix, limit)] = [
+            self.items[item_id][2] for item_id in ranked
+        ]
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+        return result
+
+
+class Suggester:
+    """
+    Подсказки по нескольким видам объектов, каждый со своим индексом.
+
+    Индекс вида строится при первом запросе и дальше обновляется
+    сигналами. Индексы живут в памяти процесса, поэтому изменения,
+    сделанные другими процессами, подхватываются полной перестройкой
+    раз в `rebuild_seconds`. Перестройка идёт в фоновом потоке, пока
+    запросы обслуживает прежний индекс; изменения, пришедшие за время
+    перестройки, применяются к новому индексу перед подменой.
+    """
+
+    def __init__(self, loaders, rebuild_seconds):
+        self.loaders = loaders
+        self.rebuild_seconds = rebuild_seconds
+        self.indexes = {}
+        self.built = {}
+        # Изменения видов, индекс которых сейчас перестраивается.
+        self.changes = {}
+        self.generations = {kind: 0 for kind in loaders}
+        self.lock = threading.Lock()
+        self.build_locks = {kind: threading.Lock() for kind in loaders}
+
+    def build(self, kind):
+        """
+        Строит индекс вида и подменяет им прежний. Вне блокировки
+        индексов, поэтому запросы не ждут построения.
+        """
+        with self.lock:
+            generation = self.generations[kind]
+            self.changes[kind] = []
+        try:
+            index = PrefixIndex(self.loaders[kind]())
+        except BaseException:
+            with self.lock:
+                self.changes.pop(kind, None)
+            raise
+        with self.lock:
+            changes = self.changes.pop(kind, [])
+            if generation != self.generations[kind]:
+                return self.indexes.get(kind)
+            for method, args in changes:
+                getattr(index, method)(*args)
+            self.indexes[kind] = index
+            self.built[kind] = time.monotonic()
+        return index
+
+    def rebuild_in_background(self, kind):
+        def run():
+            try:
+                self.build(kind)
+            finally:
+                self.build_locks[kind].release()
+                # Потоку Django открыл собственное соединение с базой.
+                connection.close()
+
+        if self.build_locks[kind].acquire(blocking=False):
+            threading.Thread(target=run, daemon=True).start()
+
+    def get_index(self, kind):
+        with self.lock:
+            index = self.indexes.get(kind)
+            stale = index is not None and (
+                index.needs_rebuild
+                or time.monotonic() - self.built[kind] > self.rebuild_seconds
+            )
+        if index is None:
+            # Первый запрос ждёт построения; остальные виды не блокируются.
+            with self.build_locks[kind]:
+                with self.lock:
+                    index = self.indexes.get(kind)
+                if index is None:
+                    index = self.build(kind)
+        elif stale:
+            self.rebuild_in_background(kind)
+        return index
+
+    def suggest(self, kind, prefix, limit):
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+        index = self.get_index(kind)
+        with self.lock:
+            return index.search(prefix, limit)
+
+    def update(self, kind, method, *args):
+        """Применяет изменение к уже построенному индексу."""
+        with self.lock:
+            index = self.indexes.get(kind)
+            if index is not None:
+                getattr(index, method)(*args)
+            if kind in self.changes:
+                self.changes[kind].append((method, args))
+
+    def invalidate(self, *kinds):
+        with self.lock:
+            for kind in kinds:
+                self.generations[kind] += 1
+                self.indexes.pop(kind, None)
+                self.built.pop(kind, None)
+
+    def clear(self):
+        self.invalidate(*self.loaders)
+
+
+def title_payload(title_id, name):
+    return {'id': title_id, 'name': name}
+
+
+def slug_payload(slug, name):
+    return {'name': name, 'slug': slug}
+
+
+def user_payload(username):
+    return {'username': username}
+
+
+def load_titles():
+    for pk, name, reviews in Title.objects.values_list(
+        'pk', 'name', 'review_count'
+    ).iterator():
+        yield pk, name, title_payload(pk, name), reviews
+
+
+def load_slugged(model, relation):
+    # Популярность жанра и категории — число произведений в них.
+    for pk, name, slug, titles in model.objects.annotate(
+        popularity=Count(relation)
+    ).values_list('pk', 'name', 'slug', 'popularity'):
+        yield pk, name, slug_payload(slug, name), titles
+
+
+def load_users():
+    for pk, username, reviews in User.objects.annotate(
+        popularity=Count('reviews')
+    ).values_list('pk', 'username', 'popularity').iterator():
+        yield pk, username, user_payload(username), reviews
+
+
+suggester = Suggester(
+    {
+        'titles': load_titles,
+        'genres': lambda: load_slugged(Genre, 'genre'),
+        'categories': lambda: load_slugged(Category, 'categories'),
+        'users': load_users,
+    },
+    rebuild_seconds=settings.SUGGEST_REBUILD_SECONDS,
+)
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (APIMyself, APISignUp, APIToken, CategoryViewSet,
-                    CommentsViewSet, GenreViewSet, ReviewViewSet, TitleViewSet,
-                    UserProfile, UserViewSet)
+from .views import (APICacheStats, APIMailStats, APIMyself, APISignUp,
+                    APISuggest, APIToken, CategoryViewSet, CommentsViewSet,
+                    GenreViewSet, ReviewSearchViewSet, ReviewViewSet,
+                    TitleViewSet, UserProfile, UserViewSet)
 
 app_name = 'users'
 
@@ -16,6 +17,11 @@ router_v1.register(
 )
 router_v1.register(r'titles', TitleViewSet, basename='titles')
 router_v1.register(r'users', UserViewSet, basename='users')
+router_v1.register(
+    r'reviews/search',
+    ReviewSearchViewSet,
+    basename='review-search'
+)
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -47,5 +53,20 @@ urlpatterns = [
         UserProfile.as_view(),
         name='profile'
     ),
+    path(
+        'v1/cache/stats/',
+        APICacheStats.as_view(),
+        name='cache_stats'
+    ),
+    path(
+        'v1/mail/stats/',
+        APIMailStats.as_view(),
+        name='mail_stats'
+    ),
+    path(
+        'v1/suggest/',
+        APISuggest.as_view(),
+        name='suggest'
+    ),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,26 +1,29 @@
-from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics, status, views, viewsets
+from rest_framework import (filters, generics, mixins, status, views,
+                            viewsets)
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, Genre, Review, Title, User
-from .filters import TitleFilter
-from .mixins import CreateViewDeleteMixinSet
-from .pagination import PagePagination
+from reviews import confirmation, mail, outbox
+from reviews.models import Category, Comments, Genre, Review, Title, User
+from .authentication import RoleAccessToken, get_cached_user
+from .facets import get_facets
+from .filters import FullTextSearchFilter, StableOrderingFilter, TitleFilter
+from .cache import get_cache_stats
+from .mixins import (CreateViewDeleteMixinSet, OptimisticConcurrencyMixin,
+                     VersionedResponseCacheMixin)
+from .pagination import CachedCountPagination, PagePagination
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsOwnerOrAdminOrModerator
 from .serializers import (CategorySerializer, CommentsSerializer,
                           GenreSerializer, MyselfSerializer, ReviewSerializer,
                           SignUpSerializer, TitleReadSerializer,
                           TitleWriteSerializer, TokenSerializer,
                           UserSerializer)
+from .suggest import suggester
 
 
 class APIToken(views.APIView):
@@ -31,9 +34,17 @@ class APIToken(views.APIView):
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data['username']
         confirmation_code = serializer.validated_data['confirmation_code']
-        user = get_object_or_404(User, username=username)
-        if default_token_generator.check_token(user, confirmation_code):
-            token = str(AccessToken.for_user(user))
+        # Один запрос по уникальному индексу username: только поля,
+        # нужные для проверки кода и claims токена.
+        user = get_object_or_404(
+            User.objects.only(
+                *User.token_claim_fields, 'token_version',
+                *confirmation.FIELDS,
+            ),
+            username=username,
+        )
+        if confirmation.check(user, confirmation_code):
+            token = str(RoleAccessToken.for_user(user))
             return Response(
                 {'token': token},
                 status=status.HTTP_201_CREATED
@@ -44,7 +55,55 @@ class APIToken(views.APIView):
         )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class APICacheStats(views.APIView):
+    """View-класс со счётчиками попаданий в кэш ответов."""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(get_cache_stats(), status=status.HTTP_200_OK)
+
+
+class APIMailStats(views.APIView):
+    """View-класс со счётчиками отправки писем из очереди."""
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(mail.get_mail_stats(), status=status.HTTP_200_OK)
+
+
+class APISuggest(views.APIView):
+    """
+    View-класс подсказок для автодополнения по префиксу `q`.
+    Имена пользователей подсказываются только администраторам.
+    """
+
+    kinds = ('titles', 'genres', 'categories')
+    admin_kinds = ('users',)
+    default_limit = 10
+    max_limit = 20
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get(self, request):
+        prefix = request.query_params.get('q', '')
+        limit = self.get_limit(request)
+        kinds = self.kinds
+        if request.user.is_authenticated and request.user.is_admin:
+            kinds += self.admin_kinds
+        return Response(
+            {kind: suggester.suggest(kind, prefix, limit) for kind in kinds},
+            status=status.HTTP_200_OK
+        )
+
+
+class UserViewSet(OptimisticConcurrencyMixin, viewsets.ModelViewSet):
     """ViewSet для добавление/удаления пользователей администратором."""
 
     queryset = User.objects.all().order_by('id')
@@ -57,7 +116,8 @@ class UserViewSet(viewsets.ModelViewSet):
     pagination_class = PagePagination
 
 
-class UserProfile(generics.RetrieveUpdateDestroyAPIView):
+class UserProfile(OptimisticConcurrencyMixin,
+                  generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
@@ -74,14 +134,16 @@ class APIMyself(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        # Пользователь из токена загружает только поля claims.
         serializer = MyselfSerializer(
-            self.request.user
+            get_cached_user(request.user.pk)
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request):
+        # Изменения сохраняются поверх свежей строки, а не копии из кэша.
         serializer = MyselfSerializer(
-            self.request.user,
+            User.objects.get(pk=request.user.pk),
             data=request.data,
             partial=True
         )
@@ -93,7 +155,9 @@ class APIMyself(views.APIView):
         )
 
 
-class GenreViewSet(CreateViewDeleteMixinSet):
+class GenreViewSet(VersionedResponseCacheMixin,
+                   CreateViewDeleteMixinSet):
+    cache_name = 'genres'
     queryset = Genre.objects.all().order_by('id')
     serializer_class = GenreSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -103,7 +167,9 @@ class GenreViewSet(CreateViewDeleteMixinSet):
     lookup_field = 'slug'
 
 
-class CategoryViewSet(CreateViewDeleteMixinSet):
+class CategoryViewSet(VersionedResponseCacheMixin,
+                      CreateViewDeleteMixinSet):
+    cache_name = 'categories'
     queryset = Category.objects.all().order_by('id')
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -113,58 +179,122 @@ class CategoryViewSet(CreateViewDeleteMixinSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by('id')
+class TitleViewSet(OptimisticConcurrencyMixin, VersionedResponseCacheMixin,
+                   viewsets.ModelViewSet):
+    cache_name = 'titles'
+    cache_actions = ('list', 'retrieve')
+    # Рейтинг меняется через отзывы, поэтому их версия тоже в ключе.
+    cache_models = (Title, Genre, Category, Review)
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('id')
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
-    pagination_class = PagePagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter,
+                       StableOrderingFilter]
+    ordering_fields = ('rating', 'review_count', 'year', 'name', 'id')
+    pagination_class = CachedCountPagination
+    # Фильтры по рейтингу зависят от отзывов, как и кэш ответов.
+    count_cache_models = (Title, Genre, Category, Review)
     filterset_class = TitleFilter
 
+    facets_query_param = 'facets'
+
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Список произведений. С `?facets=genre,category,year` ответ
+        дополнительно содержит число произведений по каждому значению
+        этих измерений при текущих фильтрах.
+        """
+        response = super().list(request, *args, **kwargs)
+        names = request.query_params.get(self.facets_query_param)
+        if names:
+            response.data['facets'] = get_facets(
+                self.filter_queryset(self.get_queryset()),
+                {name.strip() for name in names.split(',')},
+            )
+        return response
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(OptimisticConcurrencyMixin, VersionedResponseCacheMixin,
+                    viewsets.ModelViewSet):
+    cache_name = 'reviews'
+    cache_models = (Review, Title, Comments, User)
     serializer_class = ReviewSerializer
-    pagination_class = PagePagination
+    filter_backends = [StableOrderingFilter]
+    ordering_fields = ('comment_count', 'pub_date')
+    pagination_class = CachedCountPagination
+    cursor_ordering = ('pub_date', 'id')
     permission_classes = [IsAuthenticatedOrReadOnly,
                           IsOwnerOrAdminOrModerator]
 
     def get_title(self):
-        return get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id')
-        )
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                id=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Обратный менеджер сам проставляет отзывам загруженное произведение.
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self.get_title()
-        )
+        # Повторный отзыв отсекает ограничение unique_review при вставке,
+        # без отдельного запроса на проверку.
+        try:
+            serializer.save(
+                author=self.request.user,
+                title=self.get_title()
+            )
+        except IntegrityError:
+            raise ValidationError(
+                {'non_field_errors': ['Нельзя оставить повторный отзыв']}
+            )
+
+
+class ReviewSearchViewSet(VersionedResponseCacheMixin,
+                          mixins.ListModelMixin,
+                          viewsets.GenericViewSet):
+    """Поиск по текстам отзывов всех произведений."""
+
+    cache_name = 'review-search'
+    cache_models = (Review, Title, Comments, User)
+    queryset = Review.objects.select_related(
+        'author', 'title'
+    ).order_by('id')
+    serializer_class = ReviewSerializer
+    filter_backends = [FullTextSearchFilter]
+    pagination_class = CachedCountPagination
+    count_cache_models = (Review,)
 
 
 class CommentsViewSet(viewsets.ModelViewSet):
     serializer_class = CommentsSerializer
     permission_classes = [IsAuthenticatedOrReadOnly,
                           IsOwnerOrAdminOrModerator]
-    pagination_class = PagePagination
+    pagination_class = CachedCountPagination
+    cursor_ordering = ('pub_date', 'id')
 
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
+        """Отзыв из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title__id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        # Обратный менеджер сам проставляет комментариям загруженный отзыв.
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         return serializer.save(
@@ -181,26 +311,27 @@ class APISignUp(views.APIView):
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data['username']
         email = serializer.validated_data['email']
+        confirmation_code, code_fields = confirmation.new_code(username)
+        # Пользователь и письмо с кодом сохраняются вместе: без письма
+        # регистрация откатывается. Письмо отправит воркер, запрос не
+        # ждёт SMTP-сервер.
         try:
-            user, created = User.objects.get_or_create(
-                username=username,
-                email=email,
-            )
+            with transaction.atomic():
+                user, created = User.objects.get_or_create(
+                    username=username,
+                    email=email,
+                    defaults=code_fields,
+                )
+                if not created:
+                    # Пока код действует, повторная регистрация получает
+                    # его же, не записывая пользователя.
+                    confirmation_code = confirmation.issue(user)
+                outbox.enqueue('Confirmation code', confirmation_code, email)
         except IntegrityError:
             return Response(
                 {'message': 'IntegrityError'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        confirmation_code = default_token_generator.make_token(user)
-        user.confirmation_code = confirmation_code
-        user.save()
-        send_mail(
-            'Confirmation code',
-            confirmation_code,
-            settings.EMAIL_HOST_USER,
-            [email],
-            fail_silently=False,
-        )
         return Response(
             serializer.data,
             status=status.HTTP_200_OK
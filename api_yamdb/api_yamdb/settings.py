@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -71,6 +72,36 @@ DATABASES = {
     }
 }
 
+# В кэше живут версии моделей, по которым сбрасываются ответы, ETag и
+# счётчики страниц, версии токенов и статистика почты. Он должен быть
+# общим для всех процессов (веб-воркеров и send_outbox): с кэшем в
+# памяти процесса (LocMemCache) изменение в одном воркере не сбрасывает
+# ответы других. В продакшене — Redis или Memcached через CACHE_BACKEND
+# и CACHE_LOCATION, по умолчанию — файлы на этой машине.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_cache'),
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Двухуровневый кэш ответов API (api/cache.py).
+RESPONSE_CACHE_LOCAL_MAX_BYTES = 16 * 1024 * 1024
+RESPONSE_CACHE_FRESH_SECONDS = 60
+RESPONSE_CACHE_STALE_SECONDS = 5 * 60
+RESPONSE_CACHE_LOCK_SECONDS = 5
+
+# Индекс подсказок в памяти процесса (api/suggest.py): полная перестройка,
+# чтобы подхватить изменения из других процессов.
+SUGGEST_REBUILD_SECONDS = 10 * 60
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,7 +147,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
 
 }
@@ -125,8 +156,15 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=3),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Сколько секунд версия токенов пользователя живёт в кэше.
+TOKEN_VERSION_CACHE_SECONDS = 60
+# Кэш пользователей в памяти процесса (api/authentication.py).
+USER_CACHE_MAX_SIZE = 1024
+USER_CACHE_SECONDS = 30
 
 LENGTH_CONF_CODE = 8
+# Срок действия кода подтверждения.
+CONFIRMATION_CODE_SECONDS = 60 * 60
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.mail.ru'
@@ -137,3 +175,18 @@ EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
 SERVER_EMAIL = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Письма отправляет команда send_outbox. В режиме EMAIL_OUTBOX_EAGER
+# они уходят сразу после фиксации транзакции запроса.
+EMAIL_OUTBOX_EAGER = os.getenv('EMAIL_OUTBOX_EAGER', 'False') == 'True'
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_SECONDS = 30
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 60 * 60
+EMAIL_OUTBOX_LEASE_SECONDS = 5 * 60
+# Сколько секунд воркер ждёт, пока наполнится неполная пачка.
+EMAIL_OUTBOX_BATCH_WINDOW_SECONDS = 0.2
+# Открытые SMTP-соединения, которые процесс держит для повторного
+# использования, и время, после которого простаивающее переоткрывается.
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_MAX_IDLE_SECONDS = 60
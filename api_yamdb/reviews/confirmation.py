@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+# Без похожих символов: 0/O, 1/I.
+ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+CODE_SALT = 'reviews.confirmation.code'
+HASH_SALT = 'reviews.confirmation.hash'
+FIELDS = ('confirmation_code', 'confirmation_code_expires')
+
+
+def make_code(username, expires):
+    """
+    Код выводится из имени пользователя и срока действия, поэтому
+    повторная регистрация до истечения срока получает тот же код
+    без записи в базу.
+    """
+    digest = salted_hmac(
+        CODE_SALT, f'{username}:{int(expires.timestamp())}'
+    ).digest()
+    return ''.join(
+        ALPHABET[byte % len(ALPHABET)]
+        for byte in digest[:settings.LENGTH_CONF_CODE]
+    )
+
+
+def hash_code(code):
+    return salted_hmac(HASH_SALT, code.strip().upper()).hexdigest()
+
+
+def new_code(username):
+    """Новый код и значения полей пользователя, которые его хранят."""
+    expires = (
+        timezone.now()
+        + timedelta(seconds=settings.CONFIRMATION_CODE_SECONDS)
+    ).replace(microsecond=0)
+    code = make_code(username, expires)
+    return code, {
+        'confirmation_code': hash_code(code),
+        'confirmation_code_expires': expires,
+    }
+
+
+def current_code(user):
+    """Действующий код пользователя или None, если нужен новый."""
+    expires = user.confirmation_code_expires
+    if expires is None or expires <= timezone.now():
+        return None
+    code = make_code(user.username, expires)
+    # Код, выданный до переименования пользователя, заново не вывести.
+    if not constant_time_compare(hash_code(code), user.confirmation_code):
+        return None
+    return code
+
+
+def issue(user):
+    """
+    Возвращает действующий код пользователя, а если его нет — выдаёт
+    новый, записывая только поля кода.
+    """
+    code = current_code(user)
+    if code is None:
+        code, fields = new_code(user.username)
+        for name, value in fields.items():
+            setattr(user, name, value)
+        user.save(update_fields=FIELDS)
+    return code
+
+
+def check(user, code):
+    expires = user.confirmation_code_expires
+    return (
+        expires is not None
+        and expires > timezone.now()
+        and user.confirmation_code is not None
+        and constant_time_compare(hash_code(code), user.confirmation_code)
+    )
@@ -0,0 +1,91 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F
+
+from .models import MailStats
+
+# Счётчики отправки; время хранится в микросекундах.
+STATS_NAMES = ('batches', 'messages', 'sent', 'failed', 'send_us')
+
+
+class ConnectionPool:
+    """
+    Пул открытых соединений почтового бэкенда, общий для потоков
+    процесса. Соединение возвращается в пул после отправки и
+    используется повторно без нового TLS-рукопожатия. Простоявшее
+    дольше `max_idle_seconds` соединение переоткрывается: SMTP-серверы
+    сами закрывают неактивные сессии.
+    """
+
+    def __init__(self, max_size, max_idle_seconds):
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            connection, released = (
+                self._idle.pop() if self._idle else (None, None)
+            )
+        if connection is None:
+            connection = get_connection()
+        elif time.monotonic() - released > self.max_idle_seconds:
+            connection.close()
+        # Открывает соединение отправитель: ошибку подключения он
+        # засчитывает пачке, а не пропускает наружу.
+        try:
+            yield connection
+        except BaseException:
+            connection.close()
+            raise
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+def record_batch(size, sent, failed, seconds):
+    """Учитывает отправку пачки: размер, исход и время отправки."""
+    values = {
+        'batches': 1, 'messages': size, 'sent': sent, 'failed': failed,
+        'send_us': round(seconds * 1e6),
+    }
+    increments = {name: F(name) + value for name, value in values.items()}
+    row = MailStats.objects.filter(pk=MailStats.ROW)
+    if not row.update(**increments):
+        MailStats.objects.get_or_create(pk=MailStats.ROW)
+        row.update(**increments)
+
+
+def get_mail_stats():
+    """Счётчики отправки и средние размер пачки и время её отправки."""
+    stats = MailStats.objects.filter(pk=MailStats.ROW).values(
+        *STATS_NAMES
+    ).first() or dict.fromkeys(STATS_NAMES, 0)
+    batches = stats['batches']
+    send_us = stats.pop('send_us')
+    if batches:
+        stats['avg_batch_size'] = round(stats['messages'] / batches, 2)
+        stats['avg_send_ms'] = round(send_us / batches / 1000, 3)
+    else:
+        stats['avg_batch_size'] = stats['avg_send_ms'] = 0
+    return stats
+
+
+pool = ConnectionPool(
+    max_size=settings.EMAIL_POOL_SIZE,
+    max_idle_seconds=settings.EMAIL_POOL_MAX_IDLE_SECONDS,
+)
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+
+@contextmanager
+def raw_dates(model):
+    """Отключает auto_now_add, чтобы сохранить переданные даты."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(objects, batch_size):
+    """Разбивает поток объектов на списки не длиннее batch_size."""
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def reconcile(model, recalculate, chunk_size, check=False):
+    """
+    Пересчитывает хранимые агрегаты пачками по id: recalculate(ids)
+    исправляет строки пачки и возвращает число расходившихся. Каждая
+    пачка в своей транзакции; при check изменения откатываются.
+    Возвращает пару (проверено, расхождений).
+    """
+    checked = drifted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return checked, drifted
+        with transaction.atomic():
+            drifted += recalculate(ids)
+            if check:
+                transaction.set_rollback(True)
+        checked += len(ids)
+        last_id = ids[-1]
+
+
+def finish_bulk_load(models, stdout):
+    """
+    Доделывает то, что bulk_create пропускает: сдвигает последовательности
+    после явных id, пересчитывает хранимые счётчики и сбрасывает кэш API,
+    версии которого обновляются только сигналами.
+    """
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    call_command('reconcile_counters', stdout=stdout)
+    cache.clear()
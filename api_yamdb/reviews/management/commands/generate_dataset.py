@@ -0,0 +1,210 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.management.bulk import batches, finish_bulk_load, raw_dates
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+END_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    'сюжет', 'актёры', 'музыка', 'финал', 'герой', 'книга', 'фильм',
+    'сильный', 'скучный', 'неожиданный', 'красивый', 'затянутый',
+    'рекомендую', 'пересмотрю', 'спорный', 'атмосфера',
+)
+
+
+def zipf_weights(size, exponent):
+    """Доли элементов по закону Ципфа: вес ранга r пропорционален r^-s."""
+    weights = [rank ** -exponent for rank in range(1, size + 1)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def zipf_rank(rng, size, exponent):
+    """
+    Ранг от 1 до size с распределением, близким к Ципфу, через обратную
+    функцию распределения непрерывного приближения. Памяти не требует.
+    """
+    if exponent == 1:
+        return min(int(size ** rng.random()), size)
+    power = 1 - exponent
+    value = ((size ** power - 1) * rng.random() + 1) ** (1 / power)
+    return min(max(int(value), 1), size)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует детерминированный синтетический набор данных '
+        'для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        counts = (
+            ('users', 1000), ('categories', 10), ('genres', 30),
+            ('titles', 1000), ('reviews', 20000), ('comments', 50000),
+        )
+        for name, default in counts:
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество: {name} (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно даёт одинаковые данные.',
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности произведений.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одном INSERT.',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'categories', 'genres', 'titles',
+                     'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должен быть положительным.')
+        for name in ('reviews', 'comments'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} не может быть отрицательным.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        users = self.insert(User, self.users, options['users'])
+        categories = self.insert(
+            Category, self.categories, options['categories']
+        )
+        genres = self.insert(Genre, self.genres, options['genres'])
+        titles = self.insert(
+            Title, self.titles, options['titles'], categories
+        )
+        self.insert(
+            Title.genre.through, self.title_genres, None, titles, genres
+        )
+        reviews = self.insert(
+            Review, self.reviews, options['reviews'], titles, users,
+            options['zipf'],
+        )
+        if reviews:
+            self.insert(
+                Comments, self.comments, options['comments'], reviews,
+                users, options['zipf'],
+            )
+        finish_bulk_load(
+            [User, Category, Genre, Title, Title.genre.through, Review,
+             Comments],
+            self.stdout,
+        )
+
+    def insert(self, model, factory, count, *args):
+        """
+        Вставляет объекты из генератора пачками в одной транзакции.
+        Возвращает диапазон id созданных строк.
+        """
+        first_id = (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+        created = 0
+        with transaction.atomic(), raw_dates(model):
+            for batch in batches(factory(first_id, count, *args),
+                                 self.batch_size):
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                created += len(batch)
+        self.stdout.write(f'{model._meta.db_table}: создано {created}.')
+        return range(first_id, first_id + created)
+
+    def dates(self, count):
+        """Возрастающие даты, равномерно в среднем покрывающие период."""
+        step = (END_DATE - START_DATE).total_seconds() / max(count, 1)
+        moment = START_DATE
+        while True:
+            moment += timedelta(seconds=self.rng.uniform(0, 2 * step))
+            yield min(moment, END_DATE)
+
+    def text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def users(self, first_id, count):
+        for pk in range(first_id, first_id + count):
+            yield User(
+                id=pk,
+                username=f'user{pk}',
+                email=f'user{pk}@yamdb.fake',
+                password='!',
+                date_joined=START_DATE,
+            )
+
+    def categories(self, first_id, count):
+        for pk in range(first_id, first_id + count):
+            yield Category(
+                id=pk, name=f'Категория {pk}', slug=f'category-{pk}'
+            )
+
+    def genres(self, first_id, count):
+        for pk in range(first_id, first_id + count):
+            yield Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+
+    def titles(self, first_id, count, categories):
+        for pk in range(first_id, first_id + count):
+            yield Title(
+                id=pk,
+                name=f'Произведение {pk} {self.text(2)}',
+                year=self.rng.randint(1900, START_DATE.year),
+                description=self.text(12),
+                category_id=self.rng.choice(categories),
+            )
+
+    def title_genres(self, first_id, count, titles, genres):
+        through = Title.genre.through
+        pk = first_id
+        for title_id in titles:
+            size = min(self.rng.randint(1, 3), len(genres))
+            for genre_id in sorted(self.rng.sample(genres, size)):
+                yield through(id=pk, title_id=title_id, genre_id=genre_id)
+                pk += 1
+
+    def reviews(self, first_id, count, titles, users, exponent):
+        """
+        Распределяет отзывы по произведениям по закону Ципфа: произведение
+        с рангом r получает долю r^-s. Авторы внутри произведения не
+        повторяются, как того требует unique_review, поэтому излишек
+        сверх числа пользователей переходит к следующим по рангу.
+        """
+        ranked = list(titles)
+        self.rng.shuffle(ranked)
+        weights = zipf_weights(len(ranked), exponent)
+        pk = first_id
+        dates = self.dates(count)
+        carry = 0
+        for title_id, weight in zip(ranked, weights):
+            wanted = round(count * weight) + carry
+            size = min(wanted, len(users))
+            carry = wanted - size
+            quality = self.rng.uniform(3, 9)
+            for author_id in self.rng.sample(users, size):
+                score = round(self.rng.gauss(quality, 2))
+                yield Review(
+                    id=pk,
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=self.text(self.rng.randint(5, 40)),
+                    score=min(max(score, 1), 10),
+                    pub_date=next(dates),
+                )
+                pk += 1
+
+    def comments(self, first_id, count, reviews, users, exponent):
+        dates = self.dates(count)
+        for pk in range(first_id, first_id + count):
+            rank = zipf_rank(self.rng, len(reviews), exponent)
+            yield Comments(
+                id=pk,
+                review_id=reviews[rank - 1],
+                author_id=self.rng.choice(users),
+                text=self.text(self.rng.randint(3, 20)),
+                pub_date=next(dates),
+            )
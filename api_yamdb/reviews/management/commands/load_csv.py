@@ -0,0 +1,138 @@
+import csv
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+
+from reviews.management.bulk import batches, finish_bulk_load, raw_dates
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+# Файл, модель и соответствие колонок CSV внешним ключам:
+# колонка -> (атрибут модели, модель, на которую ссылается ключ).
+TABLES = (
+    ('users.csv', User, {}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': ('category_id', Category)}),
+    ('genre_title.csv', Title.genre.through, {
+        'title_id': ('title_id', Title),
+        'genre_id': ('genre_id', Genre),
+    }),
+    ('review.csv', Review, {
+        'title_id': ('title_id', Title),
+        'author': ('author_id', User),
+    }),
+    ('comments.csv', Comments, {
+        'review_id': ('review_id', Review),
+        'author': ('author_id', User),
+    }),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает CSV из static/data пачками через bulk_create. '
+        'Каждая таблица загружается в одной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=Path(settings.BASE_DIR) / 'static' / 'data',
+            type=Path,
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одном INSERT.',
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--append',
+            action='store_true',
+            help='Добавить строки к существующим (по умолчанию).',
+        )
+        mode.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Очистить загружаемые таблицы перед загрузкой.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        for filename, _, _ in TABLES:
+            if not (options['path'] / filename).is_file():
+                raise CommandError(
+                    f'Не найден файл {options["path"] / filename}.'
+                )
+        if options['truncate']:
+            self.truncate([model for _, model, _ in TABLES])
+        self.known_ids = {}
+        for filename, model, foreign_keys in TABLES:
+            self.load_table(
+                options['path'] / filename, model, foreign_keys,
+                options['batch_size'],
+            )
+        finish_bulk_load([model for _, model, _ in TABLES], self.stdout)
+
+    def truncate(self, models):
+        tables = [model._meta.db_table for model in models]
+        sql_list = connection.ops.sql_flush(
+            no_style(), tables, reset_sequences=True
+        )
+        connection.ops.execute_sql_flush(sql_list)
+
+    def get_known_ids(self, model):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True).iterator()
+            )
+        return self.known_ids[model]
+
+    def read_rows(self, path, model, foreign_keys, skipped):
+        fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        targets = {
+            column: (attname, self.get_known_ids(target))
+            for column, (attname, target) in foreign_keys.items()
+        }
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                values = {}
+                for column, value in row.items():
+                    if column in targets:
+                        attname, ids = targets[column]
+                        value = fields[attname].to_python(value)
+                        if value not in ids:
+                            break
+                        values[attname] = value
+                    else:
+                        values[column] = fields[column].to_python(value)
+                else:
+                    yield model(**values)
+                    continue
+                skipped[0] += 1
+
+    def load_table(self, path, model, foreign_keys, batch_size):
+        loaded = self.get_known_ids(model)
+        skipped = [0]
+        count = 0
+        rows = self.read_rows(path, model, foreign_keys, skipped)
+        try:
+            with transaction.atomic(), raw_dates(model):
+                for batch in batches(rows, batch_size):
+                    model.objects.bulk_create(batch, batch_size=batch_size)
+                    loaded.update(obj.pk for obj in batch)
+                    count += len(batch)
+        except IntegrityError as error:
+            raise CommandError(f'{path.name}: {error}')
+        self.stdout.write(
+            f'{path.name}: загружено {count}, пропущено {skipped[0]} '
+            'строк с неизвестными внешними ключами.'
+        )
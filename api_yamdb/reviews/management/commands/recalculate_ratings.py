@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.bulk import reconcile
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает хранимые рейтинги произведений по отзывам '
+        'пачками по id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество произведений в одной транзакции.',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не записывая.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        checked, drifted = reconcile(
+            Title, Title.recalculate_rating, chunk_size, options['check']
+        )
+        self.stdout.write(
+            f'Проверено произведений: {checked}, расхождений: {drifted}.'
+        )
+        if options['check'] and drifted:
+            raise CommandError('Хранимые рейтинги расходятся с отзывами.')
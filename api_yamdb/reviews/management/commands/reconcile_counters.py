@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.bulk import reconcile
+from reviews.models import Review, Title
+
+# Модель, метод пересчёта и подпись для отчёта.
+COUNTERS = (
+    (Title, Title.recalculate_rating, 'произведений'),
+    (Review, Review.recalculate_comment_count, 'отзывов'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Исправляет расхождения хранимых счётчиков (рейтинг и число '
+        'отзывов произведений, число комментариев отзывов) пачками по id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не записывая.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        total_drifted = 0
+        for model, recalculate, label in COUNTERS:
+            checked, drifted = reconcile(
+                model, recalculate, chunk_size, options['check']
+            )
+            total_drifted += drifted
+            self.stdout.write(
+                f'Проверено {label}: {checked}, расхождений: {drifted}.'
+            )
+        if options['check'] and total_drifted:
+            raise CommandError('Хранимые счётчики расходятся с данными.')
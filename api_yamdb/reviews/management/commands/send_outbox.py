@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews import mail, outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди исходящих пачками через '
+        'переиспользуемые SMTP-соединения из пула.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков отправки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем, которое поток забирает за раз.',
+        )
+        parser.add_argument(
+            '--window',
+            type=float,
+            default=settings.EMAIL_OUTBOX_BATCH_WINDOW_SECONDS,
+            help='Сколько секунд ждать, пока наполнится неполная пачка.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('workers', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} должен быть положительным.'
+                )
+        self.batch_size = options['batch_size']
+        self.window = options['window']
+        self.interval = options['interval']
+        self.once = options['once']
+        self.stop = threading.Event()
+        if options['workers'] == 1:
+            results = [self.work()]
+        else:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                futures = [
+                    executor.submit(self.work_in_thread)
+                    for _ in range(options['workers'])
+                ]
+                try:
+                    results = [future.result() for future in futures]
+                except KeyboardInterrupt:
+                    self.stop.set()
+                    results = [future.result() for future in futures]
+        mail.pool.close_all()
+        sent = sum(result[0] for result in results)
+        failed = sum(result[1] for result in results)
+        self.stdout.write(f'Отправлено писем: {sent}, с ошибкой: {failed}.')
+        stats = mail.get_mail_stats()
+        self.stdout.write(
+            f'Всего пачек: {stats["batches"]}, средний размер пачки: '
+            f'{stats["avg_batch_size"]}, среднее время отправки: '
+            f'{stats["avg_send_ms"]} мс.'
+        )
+
+    def work_in_thread(self):
+        try:
+            return self.work()
+        finally:
+            # Потоку Django открыл собственное соединение с базой.
+            connection.close()
+
+    def work(self):
+        sent = failed = 0
+        try:
+            while not self.stop.is_set():
+                batch = outbox.collect(self.batch_size, self.window)
+                if batch:
+                    with mail.pool.connection() as connection:
+                        batch_sent, batch_failed = outbox.send(
+                            batch, connection
+                        )
+                    sent += batch_sent
+                    failed += batch_failed
+                elif self.once:
+                    break
+                else:
+                    self.stop.wait(self.interval)
+        except KeyboardInterrupt:
+            self.stop.set()
+        return sent, failed
@@ -0,0 +1,91 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.models
+
+# Исходная таблица -> индексируемые столбцы и веса bm25.
+INDEXES = {
+    'reviews_title': (('name', 10.0), ('description', 1.0)),
+    'reviews_review': (('text', 1.0),),
+}
+
+
+def normalized(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for source, columns in INDEXES.items():
+        index = f'{source}_fts'
+        names = ', '.join(name for name, _ in columns)
+        weights = ', '.join(str(weight) for _, weight in columns)
+        new_values = ', '.join(normalized(f'new.{name}') for name, _ in columns)
+        assignments = ', '.join(
+            f'{name} = {normalized(f"new.{name}")}' for name, _ in columns
+        )
+        for sql in (
+            f"CREATE VIRTUAL TABLE {index} USING fts5({names}, "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"INSERT INTO {index}({index}, rank) "
+            f"VALUES ('rank', 'bm25({weights})')",
+            f"CREATE TRIGGER {index}_insert AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {index}(rowid, {names}) "
+            f"VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER {index}_update AFTER UPDATE OF {names} "
+            f"ON {source} BEGIN UPDATE {index} SET {assignments} "
+            f"WHERE rowid = old.id; END",
+            f"CREATE TRIGGER {index}_delete AFTER DELETE ON {source} BEGIN "
+            f"DELETE FROM {index} WHERE rowid = old.id; END",
+            f"INSERT INTO {index}(rowid, {names}) SELECT id, "
+            + ', '.join(normalized(name) for name, _ in columns)
+            + f" FROM {source}",
+        ):
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for source in INDEXES:
+        index = f'{source}_fts'
+        for action in ('insert', 'update', 'delete'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {index}_{action}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('rank', models.FloatField()),
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.title')),
+                ('document', reviews.models.FullTextField(db_column='reviews_title_fts')),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewSearch',
+            fields=[
+                ('rank', models.FloatField()),
+                ('review', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.review')),
+                ('document', reviews.models.FullTextField(db_column='reviews_review_fts')),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
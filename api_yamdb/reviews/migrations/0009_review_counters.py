@@ -0,0 +1,74 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+# SQLite пересоздаёт таблицу при AddField, удаляя триггеры
+# полнотекстового индекса из 0008_search_index: создаём их заново.
+TRIGGERS = (
+    "CREATE TRIGGER reviews_review_fts_insert AFTER INSERT ON reviews_review "
+    "BEGIN INSERT INTO reviews_review_fts(rowid, text) "
+    "VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    "CREATE TRIGGER reviews_review_fts_update AFTER UPDATE OF text "
+    "ON reviews_review BEGIN UPDATE reviews_review_fts "
+    "SET text = replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е') "
+    "WHERE rowid = old.id; END",
+    "CREATE TRIGGER reviews_review_fts_delete AFTER DELETE ON reviews_review "
+    "BEGIN DELETE FROM reviews_review_fts WHERE rowid = old.id; END",
+)
+DROP_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS reviews_review_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_delete',
+)
+
+
+def execute(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return operation
+
+
+restore_triggers = execute(TRIGGERS)
+drop_triggers = execute(DROP_TRIGGERS)
+
+
+def fill_comment_count(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comments = apps.get_model('reviews', 'Comments')
+    counts = Comments.objects.order_by().values('review_id').annotate(
+        count=Count('id')
+    )
+    for row in counts.iterator():
+        Review.objects.filter(pk=row['review_id']).update(
+            comment_count=row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='title',
+            old_name='rating_count',
+            new_name='review_count',
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(restore_triggers, drop_triggers),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
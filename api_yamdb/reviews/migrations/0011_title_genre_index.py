@@ -0,0 +1,20 @@
+from django.db import migrations
+
+# Промежуточная таблица жанров создаётся Django автоматически, поэтому
+# составной индекс для выборки произведений жанра добавляется SQL.
+# Индекс (title_id, genre_id) уже есть у ограничения уникальности.
+INDEX = 'reviews_title_genre_genre_title_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX {INDEX} ON reviews_title_genre (genre_id, title_id)',
+            f'DROP INDEX {INDEX}',
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def clear_bodies(apps, schema_editor):
+    OutboxEmail = apps.get_model('reviews', 'OutboxEmail')
+    OutboxEmail.objects.filter(status__in=('sent', 'failed')).update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_user_confirmation_code_expires'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_bodies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_outboxemail_clear_sent_bodies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batches', models.PositiveBigIntegerField(default=0, verbose_name='Пачек')),
+                ('messages', models.PositiveBigIntegerField(default=0, verbose_name='Писем')),
+                ('sent', models.PositiveBigIntegerField(default=0, verbose_name='Отправлено')),
+                ('failed', models.PositiveBigIntegerField(default=0, verbose_name='С ошибкой')),
+                ('send_us', models.PositiveBigIntegerField(default=0, verbose_name='Время отправки, мкс')),
+            ],
+            options={
+                'verbose_name': 'Статистика почты',
+                'verbose_name_plural': 'Статистика почты',
+            },
+        ),
+    ]
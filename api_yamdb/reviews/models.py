@@ -1,7 +1,11 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, F, FloatField, Lookup, Sum,
+                              Value, When)
+from django.db.models.functions import Cast
+from django.utils import timezone
 
 from .validators import UsernameValidator, validate_year
 
@@ -16,7 +20,62 @@ ROLES_CHOICES = [
 ]
 
 
-class User(AbstractUser):
+class VersionedModel(models.Model):
+    """
+    Модель с номером версии для оптимистичной блокировки: каждое
+    сохранение существующей строки увеличивает version на единицу.
+    """
+
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False,
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and (
+            update_fields is None or 'version' in update_fields
+        ):
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
+class CounterModel(models.Model):
+    """
+    Модель с денормализованными счётчиками из `counter_fields`, которые
+    меняются только атомарными UPDATE с F-выражениями. Сохранение
+    существующей строки их не перезаписывает, чтобы не затереть значения,
+    изменённые параллельными запросами.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(AbstractUser, VersionedModel):
+    # Поля, которые токен доступа несёт в подписанных claims: их
+    # изменение отзывает выданные токены.
+    token_claim_fields = (
+        'username', 'role', 'is_staff', 'is_superuser', 'is_active',
+    )
+
     username = models.CharField(
         'Username',
         max_length=150,
@@ -46,12 +105,52 @@ class User(AbstractUser):
         default=USER
     )
 
+    # Хранится хэш кода, сам код уходит только в письме.
     confirmation_code = models.CharField(
         'Код подтверждения',
         max_length=100,
         blank=True,
         null=True
     )
+    confirmation_code_expires = models.DateTimeField(
+        'Код подтверждения действует до',
+        blank=True,
+        null=True,
+    )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_token_claims()
+        return instance
+
+    def _remember_token_claims(self):
+        """Запоминает значения полей, вошедших в claims токенов."""
+        self._token_claims = tuple(
+            self.__dict__.get(field) for field in self.token_claim_fields
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and getattr(
+            self, '_token_claims', None
+        ) is not None:
+            claims = tuple(
+                self.__dict__.get(field) for field in self.token_claim_fields
+            )
+            if claims != self._token_claims:
+                self.token_version += 1
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {
+                        *update_fields, 'token_version'
+                    }
+        super().save(*args, **kwargs)
+        self._remember_token_claims()
 
     @property
     def is_admin(self):
@@ -99,7 +198,7 @@ class Category(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(CounterModel, VersionedModel):
     name = models.CharField('Наименование', max_length=256)
     year = models.PositiveIntegerField(
         validators=[validate_year]
@@ -120,16 +219,96 @@ class Title(models.Model):
         verbose_name='Категория',
         on_delete=models.CASCADE,
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    counter_fields = ('rating_sum', 'review_count', 'rating')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Сортировки списка произведений: поле и id для однозначности
+        # и курсорной пагинации.
+        indexes = [
+            models.Index(
+                fields=['rating', 'id'], name='title_rating_idx',
+            ),
+            models.Index(
+                fields=['review_count', 'id'], name='title_review_count_idx',
+            ),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def change_rating(cls, title_id, score_delta, count_delta):
+        """
+        Атомарно изменяет хранимые агрегаты отзывов произведения.
+        Рейтинг пересчитывается в том же UPDATE из новых значений.
+        """
+        new_sum = F('rating_sum') + score_delta
+        new_count = F('review_count') + count_delta
+        return cls.objects.filter(pk=title_id).update(
+            rating_sum=new_sum,
+            review_count=new_count,
+            rating=Case(
+                When(review_count=-count_delta, then=Value(None)),
+                default=Cast(new_sum, FloatField()) / new_count,
+                output_field=FloatField(),
+            ),
+        )
+
+    @classmethod
+    def recalculate_rating(cls, title_ids):
+        """
+        Пересчитывает агрегаты отзывов переданных произведений.
+        Возвращает количество произведений, значения которых изменились.
+        """
+        aggregates = {
+            row['title_id']: (row['score_sum'], row['score_count'])
+            for row in Review.objects.filter(
+                title_id__in=title_ids
+            ).order_by().values('title_id').annotate(
+                score_sum=Sum('score'), score_count=Count('id')
+            )
+        }
+        changed = []
+        for title in cls.objects.filter(pk__in=title_ids).only(
+            'rating_sum', 'review_count', 'rating'
+        ):
+            score_sum, score_count = aggregates.get(title.pk, (0, 0))
+            rating = score_sum / score_count if score_count else None
+            if (title.rating_sum, title.review_count, title.rating) != (
+                score_sum, score_count, rating
+            ):
+                title.rating_sum = score_sum
+                title.review_count = score_count
+                title.rating = rating
+                changed.append(title)
+        cls.objects.bulk_update(
+            changed, ('rating_sum', 'review_count', 'rating')
+        )
+        return len(changed)
+
 
-class Review(models.Model):
+class Review(CounterModel, VersionedModel):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -156,6 +335,13 @@ class Review(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    counter_fields = ('comment_count',)
 
     class Meta:
         ordering = ('pub_date',)
@@ -167,6 +353,81 @@ class Review(models.Model):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=['title', 'comment_count', 'id'],
+                name='review_title_comments_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='review_author_pub_date_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rating_state()
+        return instance
+
+    @classmethod
+    def change_comment_count(cls, review_id, delta):
+        return cls.objects.filter(pk=review_id).update(
+            comment_count=F('comment_count') + delta
+        )
+
+    @classmethod
+    def recalculate_comment_count(cls, review_ids):
+        """
+        Пересчитывает количество комментариев переданных отзывов.
+        Возвращает количество отзывов, значения которых изменились.
+        """
+        counts = dict(
+            Comments.objects.filter(
+                review_id__in=review_ids
+            ).order_by().values('review_id').annotate(
+                count=Count('id')
+            ).values_list('review_id', 'count')
+        )
+        changed = []
+        for review in cls.objects.filter(pk__in=review_ids).only(
+            'comment_count'
+        ):
+            count = counts.get(review.pk, 0)
+            if review.comment_count != count:
+                review.comment_count = count
+                changed.append(review)
+        cls.objects.bulk_update(changed, ('comment_count',))
+        return len(changed)
+
+    def _remember_rating_state(self):
+        """Запоминает произведение и оценку, учтённые в рейтинге."""
+        self._rating_state = (
+            self.__dict__.get('title_id'), self.__dict__.get('score')
+        )
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        old_title_id, old_score = getattr(
+            self, '_rating_state', (None, None)
+        )
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if adding:
+                Title.change_rating(self.title_id, self.score, 1)
+            elif old_score is None or old_title_id is None:
+                # Оценка не была загружена из базы: приращение неизвестно.
+                Title.recalculate_rating([self.title_id])
+            elif old_title_id != self.title_id:
+                Title.change_rating(old_title_id, -old_score, -1)
+                Title.change_rating(self.title_id, self.score, 1)
+            elif old_score != self.score:
+                Title.change_rating(self.title_id, self.score - old_score, 0)
+        self._remember_rating_state()
 
 
 class Comments(models.Model):
@@ -194,6 +455,161 @@ class Comments(models.Model):
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='comment_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:settings.LENGTH_TEXT]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if adding:
+                Review.change_comment_count(self.review_id, 1)
+
+
+class OutboxEmail(models.Model):
+    """
+    Письмо, ожидающее отправки. Запрос только сохраняет строку в своей
+    транзакции, а отправляет её команда send_outbox.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'pending'),
+        (SENT, 'sent'),
+        (FAILED, 'failed'),
+    ]
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    recipient = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now,
+    )
+    # Письма пачки, взятой воркером, недоступны другим до locked_until.
+    claim = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_idx',
+            ),
+            models.Index(fields=['claim'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipient}: {self.subject}'
+
+
+class MailStats(models.Model):
+    """
+    Счётчики отправки почты в одной строке. Их пишет send_outbox, а
+    читает API из другого процесса, поэтому они хранятся в базе.
+    """
+
+    ROW = 1
+
+    batches = models.PositiveBigIntegerField('Пачек', default=0)
+    messages = models.PositiveBigIntegerField('Писем', default=0)
+    sent = models.PositiveBigIntegerField('Отправлено', default=0)
+    failed = models.PositiveBigIntegerField('С ошибкой', default=0)
+    send_us = models.PositiveBigIntegerField(
+        'Время отправки, мкс', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика почты'
+        verbose_name_plural = 'Статистика почты'
+
+
+class FullTextField(models.TextField):
+    """
+    Скрытый столбец таблицы FTS5 с именем самой таблицы: условие MATCH
+    по нему ищет по всем индексированным столбцам.
+    """
+
+
+@FullTextField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class SearchIndex(models.Model):
+    """
+    Полнотекстовый индекс SQLite FTS5. Таблицу и триггеры, которые
+    синхронизируют её с исходной, создаёт миграция, поэтому индекс
+    обновляется и при bulk_create, и при загрузке данных командами.
+    `source_fields` — индексируемые поля исходной модели.
+    """
+
+    rank = models.FloatField()
+
+    source_fields = ()
+
+    class Meta:
+        abstract = True
+        managed = False
+
+
+class TitleSearch(SearchIndex):
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+        on_delete=models.DO_NOTHING,
+    )
+    document = FullTextField(db_column='reviews_title_fts')
+
+    source_fields = ('name', 'description')
+
+    class Meta(SearchIndex.Meta):
+        db_table = 'reviews_title_fts'
+
+
+class ReviewSearch(SearchIndex):
+    review = models.OneToOneField(
+        Review,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+        on_delete=models.DO_NOTHING,
+    )
+    document = FullTextField(db_column='reviews_review_fts')
+
+    source_fields = ('text',)
+
+    class Meta(SearchIndex.Meta):
+        db_table = 'reviews_review_fts'
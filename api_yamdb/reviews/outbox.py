@@ -0,0 +1,187 @@
+import random
+import time
+import uuid
+from smtplib import SMTPException
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import mail
+from .models import OutboxEmail
+
+
+def enqueue(subject, body, recipient):
+    """
+    Ставит письмо в очередь в текущей транзакции. В режиме
+    EMAIL_OUTBOX_EAGER письмо отправляется сразу после её фиксации.
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject, body=body, recipient=recipient
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver(ids=[email.pk]))
+    return email
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором со случайным разбросом."""
+    delay = min(
+        settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+    )
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size, ids=None):
+    """
+    Забирает до batch_size готовых к отправке писем. Пачка помечается
+    токеном и блокируется до истечения аренды, поэтому параллельные
+    воркеры не отправят одно письмо дважды; письма упавшего воркера
+    снова станут доступны после locked_until.
+    """
+    now = timezone.now()
+    ready = OutboxEmail.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+        status=OutboxEmail.PENDING,
+        next_attempt_at__lte=now,
+    )
+    if ids is not None:
+        ready = ready.filter(pk__in=ids)
+    candidates = list(
+        ready.order_by('next_attempt_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    # Условия выборки повторяются в UPDATE: кто успел первым, тот и взял.
+    ready.filter(pk__in=candidates).update(
+        claim=token,
+        locked_until=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS
+        ),
+    )
+    return list(OutboxEmail.objects.filter(claim=token).order_by('pk'))
+
+
+def collect(batch_size, window):
+    """
+    Забирает пачку и, если она неполная, ждёт до window секунд и
+    добирает её: письма, поставленные в очередь почти одновременно,
+    уходят одной пачкой.
+    """
+    batch = claim(batch_size)
+    if batch and len(batch) < batch_size and window > 0:
+        time.sleep(window)
+        batch += claim(batch_size - len(batch))
+    return batch
+
+
+class OutboxMessage(EmailMessage):
+    """Письмо из очереди; помнит, начинал ли бэкенд его отправку."""
+
+    def __init__(self, email, **kwargs):
+        super().__init__(
+            email.subject, email.body, to=[email.recipient], **kwargs
+        )
+        self.email = email
+        self.attempted = False
+
+    def message(self):
+        self.attempted = True
+        return super().message()
+
+
+def send(batch, connection):
+    """
+    Отправляет пачку одним вызовом send_messages() через соединение
+    из пула, открывая его при необходимости, и записывает результат.
+
+    Бэкенд отправляет письма по порядку и прерывается на первой ошибке,
+    поэтому письма до последнего начатого считаются отправленными, оно
+    само — неудачным, а остальные возвращаются в очередь без траты
+    попытки. Ошибка до первого письма (например, при подключении)
+    засчитывается всей пачке. Неудачные письма откладываются с растущей
+    задержкой, после EMAIL_OUTBOX_MAX_ATTEMPTS попыток помечаются failed.
+    Возвращает пару (отправлено, с ошибкой).
+    """
+    messages = [OutboxMessage(email) for email in batch]
+    started = time.monotonic()
+    try:
+        # Уже открытое соединение не переоткрывается; открытое здесь
+        # send_messages() не закроет после отправки.
+        connection.open()
+        connection.send_messages(messages)
+    except (SMTPException, OSError) as error:
+        elapsed = time.monotonic() - started
+        # Соединение могло оборваться: следующая пачка откроет новое.
+        connection.close()
+        attempted = [
+            message.email for message in messages if message.attempted
+        ]
+        if attempted:
+            sent, failed = attempted[:-1], attempted[-1:]
+            release(batch[len(attempted):])
+        else:
+            sent, failed = [], batch
+        for email in failed:
+            record_failure(email, error)
+    else:
+        elapsed = time.monotonic() - started
+        sent, failed = batch, []
+    # Текст письма с кодом подтверждения после отправки не хранится.
+    OutboxEmail.objects.filter(pk__in=[email.pk for email in sent]).update(
+        status=OutboxEmail.SENT,
+        body='',
+        sent_at=timezone.now(),
+        attempts=F('attempts') + 1,
+        claim='',
+        locked_until=None,
+    )
+    mail.record_batch(len(batch), len(sent), len(failed), elapsed)
+    return len(sent), len(failed)
+
+
+def release(emails):
+    """Возвращает неотправленные письма в очередь без траты попытки."""
+    OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+        claim='', locked_until=None,
+    )
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.claim = ''
+    email.locked_until = None
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+        email.body = ''
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=[
+        'attempts', 'last_error', 'claim', 'locked_until', 'status',
+        'next_attempt_at', 'body',
+    ])
+
+
+def deliver(batch_size=None, ids=None):
+    """
+    Отправляет все готовые письма (или только ids) пачками по
+    batch_size через соединение из пула. Возвращает пару
+    (отправлено, с ошибкой).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+    with mail.pool.connection() as connection:
+        while True:
+            batch = claim(batch_size, ids)
+            if not batch:
+                return sent, failed
+            batch_sent, batch_failed = send(batch, connection)
+            sent += batch_sent
+            failed += batch_failed
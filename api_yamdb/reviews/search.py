@@ -0,0 +1,49 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+WORD_RE = re.compile(r'\w+')
+# Ограничение на число слов, чтобы запрос не разрастался.
+MAX_WORDS = 10
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он хранится в индексе."""
+    return text.lower().replace('ё', 'е')
+
+
+def build_query(text):
+    """
+    Строит запрос FTS5 из пользовательского ввода: все слова обязательны
+    и ищутся как префиксы, что для русского текста заменяет стемминг
+    («фильм» находит «фильмы» и «фильма»). Синтаксис FTS5 во вводе
+    не интерпретируется. Возвращает None, если слов нет.
+    """
+    words = WORD_RE.findall(normalize(text))[:MAX_WORDS]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search(queryset, text):
+    """
+    Оставляет в queryset строки, найденные по тексту, и сортирует их
+    по релевантности (bm25). Вне SQLite ищет через icontains. Текст без
+    слов не фильтрует queryset, как пустой поиск в DRF.
+    """
+    query = build_query(text)
+    if query is None:
+        return queryset
+    index = queryset.model.search_entry.related.related_model
+    if connections[queryset.db].vendor != 'sqlite':
+        condition = Q()
+        for word in WORD_RE.findall(text)[:MAX_WORDS]:
+            condition &= Q(*(
+                Q(**{f'{field}__icontains': word})
+                for field in index.source_fields
+            ), _connector=Q.OR)
+        return queryset.filter(condition)
+    return queryset.filter(
+        search_entry__document__match=query
+    ).order_by('search_entry__rank', 'pk')
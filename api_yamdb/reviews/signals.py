@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Comments, Review, Title
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Убирает оценку удалённого отзыва из рейтинга произведения.
+    Срабатывает и при каскадном удалении пользователя или произведения.
+    """
+    title_id, score = getattr(
+        instance, '_rating_state', (instance.title_id, instance.score)
+    )
+    if title_id is not None and score is not None:
+        Title.change_rating(title_id, -score, -1)
+
+
+@receiver(post_delete, sender=Comments)
+def comment_deleted(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев отзыва, в том числе при каскаде."""
+    Review.change_comment_count(instance.review_id, -1)
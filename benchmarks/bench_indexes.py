@@ -0,0 +1,160 @@
+"""
+Замер вложенных списков отзывов и комментариев с составными индексами
+и без них на синтетических данных.
+
+Запуск из корня репозитория:
+
+    SECRET_KEY=bench python benchmarks/bench_indexes.py --reviews 10000000 \
+        --db /tmp/bench.sqlite3
+
+Без `--db` база создаётся в памяти, что подходит для объёмов до
+нескольких миллионов строк.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from reviews.models import Comments, Review  # noqa: E402
+
+BATCH_SIZE = 50000
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def insert_rows(table, columns, rows):
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+def fill(reviews, titles, comments):
+    authors = -(-reviews // titles)
+    now = START_DATE.isoformat()
+    insert_rows(
+        'reviews_user',
+        ('id', 'password', 'is_superuser', 'username', 'first_name',
+         'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+         'bio', 'role', 'version', 'token_version'),
+        ((i, '', False, f'user{i}', '', '', f'user{i}@yamdb.fake', False,
+          True, now, '', 'user', 1, 0) for i in range(1, authors + 1))
+    )
+    insert_rows('reviews_category', ('id', 'name', 'slug'),
+                [(1, 'Категория', 'category')])
+    insert_rows(
+        'reviews_title',
+        ('id', 'name', 'year', 'description', 'category_id', 'rating_sum',
+         'review_count', 'version'),
+        ((i, f'Произведение {i}', 2000, '', 1, 0, 0, 1)
+         for i in range(1, titles + 1))
+    )
+    insert_rows(
+        'reviews_review',
+        ('id', 'author_id', 'title_id', 'text', 'score', 'pub_date',
+         'comment_count', 'version'),
+        ((i, i // titles + 1, i % titles + 1, 'text', 5,
+          (START_DATE + timedelta(seconds=i)).isoformat(), 0, 1)
+         for i in range(reviews))
+    )
+    insert_rows(
+        'reviews_comments',
+        ('id', 'author_id', 'review_id', 'text', 'pub_date'),
+        ((i, i % authors + 1, i % reviews, 'text',
+          (START_DATE + timedelta(seconds=i)).isoformat())
+         for i in range(1, comments + 1))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def querysets(titles):
+    title_id = titles // 2
+    return {
+        'reviews of title': Review.objects.filter(
+            title_id=title_id
+        ).order_by('pub_date', 'id')[:10],
+        'reviews of title, deep page': Review.objects.filter(
+            title_id=title_id
+        ).order_by('pub_date', 'id')[50:60],
+        'comments of review': Comments.objects.filter(
+            review_id=title_id
+        ).order_by('pub_date', 'id')[:10],
+        'reviews by author': Review.objects.filter(
+            author_id=1
+        ).order_by('-pub_date')[:10],
+        'comments by author': Comments.objects.filter(
+            author_id=1
+        ).order_by('-pub_date')[:10],
+    }
+
+
+def measure(titles, repeat):
+    results = {}
+    for name, queryset in querysets(titles).items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset._chain())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (statistics.median(timings), queryset.explain())
+    return results
+
+
+def report(title, results):
+    print(f'\n== {title}')
+    for name, (median, plan) in results.items():
+        print(f'{name:30} {median:10.3f} ms')
+        for line in plan.splitlines():
+            print(f'    {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--reviews', type=int, default=200000)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', help='Файл SQLite для тестовой базы.')
+    options = parser.parse_args()
+
+    if options.db:
+        settings.DATABASES['default']['TEST'] = {'NAME': options.db}
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        fill(options.reviews, options.titles, options.comments)
+        print(f'Загружено за {time.perf_counter() - started:.1f} s')
+        report('с индексами', measure(options.titles, options.repeat))
+        with connection.schema_editor() as editor:
+            for model in (Review, Comments):
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+        report('без индексов', measure(options.titles, options.repeat))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
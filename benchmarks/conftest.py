@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+# Размер набора данных задаётся переменными окружения BENCH_<ИМЯ>.
+DATASET = {
+    'users': 300,
+    'categories': 10,
+    'genres': 30,
+    'titles': 500,
+    'reviews': 10000,
+    'comments': 20000,
+}
+
+
+def dataset_args():
+    args = ['--seed', os.getenv('BENCH_SEED', '0')]
+    for name, default in DATASET.items():
+        value = os.getenv(f'BENCH_{name.upper()}', str(default))
+        args += [f'--{name}', value]
+    return args
+
+
+@pytest.fixture(scope='session')
+def dataset(django_db_setup, django_db_blocker):
+    """Набор данных создаётся один раз на сессию и не откатывается."""
+    with django_db_blocker.unblock():
+        call_command('generate_dataset', *dataset_args(),
+                     stdout=open(os.devnull, 'w'))
+        from reviews.models import Review, User
+        admin = User.objects.create_user(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role='admin'
+        )
+        # Первый отзыв относится к самому популярному произведению
+        # и собирает больше всего комментариев.
+        review = Review.objects.earliest('id')
+        return {
+            'admin': admin,
+            'user': review.author,
+            'title_id': review.title_id,
+            'review_id': review.pk,
+            'comment_id': review.comments.values_list(
+                'pk', flat=True
+            ).first(),
+        }
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def clients(dataset):
+    return {
+        'anon': APIClient(),
+        'user': client_for(dataset['user']),
+        'admin': client_for(dataset['admin']),
+    }
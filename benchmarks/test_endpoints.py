@@ -0,0 +1,280 @@
+"""
+Бенчмарк всех маршрутов api/urls.py на синтетическом наборе данных.
+
+Запуск: `pytest benchmarks/`. Для каждого эндпоинта измеряются p50/p95
+задержки, число SQL-запросов и размер ответа, результаты сравниваются
+с benchmarks/baseline.json. Изменяющие запросы получают перед каждым
+замером свой объект, созданный вне замера. Переменные окружения:
+
+* BENCH_ITERATIONS — число замеров на эндпоинт;
+* BENCH_LATENCY_TOLERANCE — во сколько раз p95 может превысить базовый;
+* BENCH_LATENCY_SLACK_MS — допустимый запас p95 в миллисекундах, чтобы
+  шум на быстрых эндпоинтах не ронял прогон;
+* BENCH_CACHE=warm — мерить с прогретыми кэшами; по умолчанию кэши
+  очищаются перед каждым замером, чтобы бюджет запросов ловил N+1;
+* BENCH_UPDATE_BASELINE=1 — перезаписать базовые значения;
+* BENCH_REPORT — путь для JSON-отчёта о прогоне.
+"""
+import json
+import os
+import statistics
+import time
+from itertools import count
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import user_cache
+from api.cache import response_cache
+from api.suggest import suggester
+from reviews import confirmation
+from reviews.models import Category, Genre, Review, Title, User
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', '20'))
+LATENCY_TOLERANCE = float(os.getenv('BENCH_LATENCY_TOLERANCE', '3'))
+LATENCY_SLACK_MS = float(os.getenv('BENCH_LATENCY_SLACK_MS', '10'))
+BYTES_TOLERANCE = 1.1
+UPDATE_BASELINE = os.getenv('BENCH_UPDATE_BASELINE') == '1'
+WARM_CACHE = os.getenv('BENCH_CACHE') == 'warm'
+
+TITLE = '/api/v1/titles/{title_id}/'
+REVIEWS = TITLE + 'reviews/'
+COMMENTS = REVIEWS + '{review_id}/comments/'
+
+# Имя, метод, шаблон адреса, клиент, данные запроса.
+ENDPOINTS = (
+    ('titles-list', 'get', '/api/v1/titles/', 'anon', None),
+    ('titles-list-filtered', 'get', '/api/v1/titles/?genre=genre-1',
+     'anon', None),
+    ('titles-list-multi-filter', 'get',
+     '/api/v1/titles/?genre=genre-1,genre-2&genre_mode=all&year_min=1950'
+     '&rating_min=5', 'anon', None),
+    ('titles-list-facets', 'get',
+     '/api/v1/titles/?category=category-1&facets=genre,category,year',
+     'anon', None),
+    ('titles-list-deep-page', 'get', '/api/v1/titles/?page=40', 'anon',
+     None),
+    ('titles-list-cursor', 'get', '/api/v1/titles/?pagination=cursor',
+     'anon', None),
+    ('titles-top-rated', 'get',
+     '/api/v1/titles/?pagination=cursor&ordering=-rating', 'anon', None),
+    ('titles-search', 'get', '/api/v1/titles/?search=сюж', 'anon', None),
+    ('titles-detail', 'get', TITLE, 'anon', None),
+    ('genres-list', 'get', '/api/v1/genres/', 'anon', None),
+    ('categories-list', 'get', '/api/v1/categories/', 'anon', None),
+    ('reviews-list', 'get', REVIEWS, 'anon', None),
+    ('reviews-list-cursor', 'get', REVIEWS + '?pagination=cursor', 'anon',
+     None),
+    ('reviews-detail', 'get', REVIEWS + '{review_id}/', 'anon', None),
+    ('reviews-search', 'get', '/api/v1/reviews/search/?search=сильный финал',
+     'anon', None),
+    ('comments-list', 'get', COMMENTS, 'anon', None),
+    ('comments-detail', 'get', COMMENTS + '{comment_id}/', 'anon', None),
+    ('users-list', 'get', '/api/v1/users/', 'admin', None),
+    ('users-detail', 'get', '/api/v1/users/{username}/', 'admin', None),
+    ('users-me', 'get', '/api/v1/users/me/', 'user', None),
+    ('suggest', 'get', '/api/v1/suggest/?q=произв', 'admin', None),
+    ('cache-stats', 'get', '/api/v1/cache/stats/', 'admin', None),
+    ('mail-stats', 'get', '/api/v1/mail/stats/', 'admin', None),
+    ('auth-signup', 'post', '/api/v1/auth/signup/', 'anon',
+     {'username': '{username}', 'email': '{email}'}),
+    ('auth-token', 'post', '/api/v1/auth/token/', 'anon',
+     {'username': '{username}', 'confirmation_code': '{code}'}),
+)
+
+# Изменяющие запросы: имя, метод, шаблон адреса, клиент, данные и
+# функция, которая создаёт объекты для замера и возвращает параметры
+# адреса.
+sequence = count()
+
+
+def new_genre(dataset):
+    number = next(sequence)
+    Genre.objects.create(name=f'Жанр {number}', slug=f'bench-genre-{number}')
+    return {'slug': f'bench-genre-{number}'}
+
+
+def new_category(dataset):
+    number = next(sequence)
+    Category.objects.create(
+        name=f'Категория {number}', slug=f'bench-category-{number}'
+    )
+    return {'slug': f'bench-category-{number}'}
+
+
+def new_title(dataset):
+    """Произведение без отзывов: на него можно оставить новый отзыв."""
+    title = Title.objects.create(
+        name=f'Произведение {next(sequence)}', year=2000,
+        category=Category.objects.earliest('id'),
+    )
+    return {'title_id': title.pk}
+
+
+def new_review(dataset):
+    params = new_title(dataset)
+    review = Review.objects.create(
+        author=dataset['user'], title_id=params['title_id'],
+        text='Отзыв для замера', score=5,
+    )
+    return {**params, 'review_id': review.pk}
+
+
+WRITE_ENDPOINTS = (
+    ('titles-create', 'post', '/api/v1/titles/', 'admin',
+     {'name': 'Новое произведение', 'year': 2001, 'category': 'category-1',
+      'genre': ['genre-1', 'genre-2']}, None),
+    ('reviews-create', 'post', REVIEWS, 'user',
+     {'text': 'Новый отзыв', 'score': 7}, new_title),
+    ('reviews-update', 'patch', REVIEWS + '{review_id}/', 'user',
+     {'score': 9}, new_review),
+    ('reviews-delete', 'delete', REVIEWS + '{review_id}/', 'user', None,
+     new_review),
+    ('comments-create', 'post', COMMENTS, 'user',
+     {'text': 'Новый комментарий'}, None),
+    ('users-me-update', 'patch', '/api/v1/users/me/', 'user',
+     {'bio': 'Обновлённое описание'}, None),
+    ('genres-delete', 'delete', '/api/v1/genres/{slug}/', 'admin', None,
+     new_genre),
+    ('categories-delete', 'delete', '/api/v1/categories/{slug}/', 'admin',
+     None, new_category),
+)
+
+results = {}
+
+
+def load_baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    yield
+    if UPDATE_BASELINE:
+        baseline = load_baseline()
+        baseline.update(results)
+        BASELINE_PATH.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + '\n'
+        )
+    if os.getenv('BENCH_REPORT'):
+        Path(os.getenv('BENCH_REPORT')).write_text(
+            json.dumps(results, indent=2, sort_keys=True) + '\n'
+        )
+
+
+def url_params(dataset):
+    user = dataset['user']
+    return {
+        'title_id': dataset['title_id'],
+        'review_id': dataset['review_id'],
+        'comment_id': dataset['comment_id'],
+        'username': user.username,
+        'email': user.email,
+        # Объект набора данных мог пережить откат прошлого теста.
+        'code': confirmation.issue(User.objects.get(pk=user.pk)),
+    }
+
+
+def measure(request, iterations, prepare=None):
+    """
+    Замеряет request(); prepare(), если задана, выполняется перед каждым
+    замером вне него, и её результат передаётся в request.
+    """
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        args = (prepare(),) if prepare else ()
+        if not WARM_CACHE:
+            cache.clear()
+            response_cache.clear_local()
+            suggester.clear()
+            user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = request(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(context.captured_queries))
+    quantiles = statistics.quantiles(timings, n=20, method='inclusive')
+    return response, {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(quantiles[18], 3),
+        'queries': queries,
+        'bytes': len(response.content),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name,method,url,client_name,data', ENDPOINTS,
+    ids=[endpoint[0] for endpoint in ENDPOINTS]
+)
+def test_endpoint_budget(dataset, clients, name, method, url, client_name,
+                         data):
+    params = url_params(dataset)
+    url = url.format(**params)
+    if data:
+        data = {key: value.format(**params) for key, value in data.items()}
+    client = clients[client_name]
+
+    def request():
+        return getattr(client, method)(url, data=data)
+
+    warmup = request()
+    assert warmup.status_code < 400, (
+        f'{name}: {warmup.status_code} {warmup.content[:200]!r}'
+    )
+    response, metrics = measure(request, ITERATIONS)
+    check_budget(name, metrics)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name,method,url,client_name,data,prepare', WRITE_ENDPOINTS,
+    ids=[endpoint[0] for endpoint in WRITE_ENDPOINTS]
+)
+def test_write_budget(dataset, clients, name, method, url, client_name,
+                      data, prepare):
+    params = url_params(dataset)
+    client = clients[client_name]
+
+    def setup():
+        return {**params, **prepare(dataset)} if prepare else params
+
+    def request(values):
+        return getattr(client, method)(
+            url.format(**values), data=data, format='json'
+        )
+
+    warmup = request(setup())
+    assert warmup.status_code < 400, (
+        f'{name}: {warmup.status_code} {warmup.content[:200]!r}'
+    )
+    response, metrics = measure(request, ITERATIONS, setup)
+    check_budget(name, metrics)
+
+
+def check_budget(name, metrics):
+    results[name] = metrics
+    budget = load_baseline().get(name)
+    if UPDATE_BASELINE or budget is None:
+        pytest.skip(f'{name}: нет базовых значений, записано {metrics}')
+    assert metrics['queries'] <= budget['queries'], (
+        f'{name}: {metrics["queries"]} SQL-запросов при бюджете '
+        f'{budget["queries"]}, вероятно, появился N+1.'
+    )
+    assert metrics['bytes'] <= budget['bytes'] * BYTES_TOLERANCE, (
+        f'{name}: ответ {metrics["bytes"]} байт при бюджете '
+        f'{budget["bytes"]}.'
+    )
+    latency_budget = max(budget['p95_ms'] * LATENCY_TOLERANCE,
+                         budget['p95_ms'] + LATENCY_SLACK_MS)
+    assert metrics['p95_ms'] <= latency_budget, (
+        f'{name}: p95 {metrics["p95_ms"]} мс при бюджете '
+        f'{latency_budget:.3f} мс.'
+    )
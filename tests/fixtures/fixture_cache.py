@@ -0,0 +1,19 @@
+import pytest
+from django.core.cache import cache
+
+from api.authentication import user_cache
+from api.cache import response_cache
+from api.suggest import suggester
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    response_cache.clear_local()
+    suggester.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    response_cache.clear_local()
+    suggester.clear()
+    user_cache.clear()
@@ -0,0 +1,12 @@
+import pytest
+
+from reviews.mail import pool
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    # Тесты API проверяют mail.outbox сразу после запроса.
+    settings.EMAIL_OUTBOX_EAGER = True
+    pool.close_all()
+    yield
+    pool.close_all()
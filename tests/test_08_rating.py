@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08StoredRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client, client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения хранится и обновляется '
+            'при создании отзыва.'
+        )
+
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 8})
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.review_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва обновляются '
+            'сумма и количество оценок произведения.'
+        )
+        assert self.get_rating(client, title_id) == 6
+
+        admin_client.delete(f'{url}{reviews[1]["id"]}/')
+        assert self.get_rating(client, title_id) == 6
+
+        moderator.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (8, 1), (
+            'Проверьте, что рейтинг пересчитывается при каскадном удалении '
+            'отзывов вместе с пользователем.'
+        )
+
+        admin.delete()
+        assert self.get_rating(client, title_id) is None, (
+            'Если у произведения не осталось отзывов, `rating` должен быть '
+            '`None`.'
+        )
+
+    def test_02_recalculate_ratings_command(self, admin_client, admin,
+                                            user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating_sum=0, review_count=0, rating=None)
+
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+        call_command('recalculate_ratings', '--chunk-size', '1')
+        call_command('recalculate_ratings', '--check')
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count, title.rating) == (
+            10, 2, 5
+        )
@@ -0,0 +1,43 @@
+import pytest
+
+from api.pagination import PagePagination
+from api.views import TitleViewSet
+from tests.utils import create_catalog
+
+PAGE_SIZES = (10, 100, 1000)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    @pytest.mark.parametrize('page_size', PAGE_SIZES)
+    def test_01_titles_list_constant_queries(self, client, monkeypatch,
+                                             django_assert_num_queries,
+                                             page_size):
+        monkeypatch.setattr(PagePagination, 'page_size', page_size)
+        # Замеряем путь через базу, а не кэш ответов.
+        monkeypatch.setattr(TitleViewSet, 'cache_actions', ())
+        create_catalog(page_size + 1)
+        # COUNT(*), произведения с категориями, жанры одним запросом.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
+        # Повторный запрос берёт `count` из кэша.
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/')
+        data = response.json()
+        assert len(data['results']) == page_size, (
+            'Проверьте, что на страницу попадает `page_size` произведений.'
+        )
+        assert all(title['genre'] for title in data['results'])
+        assert all(title['category'] for title in data['results'])
+
+    @pytest.mark.parametrize('page_size', PAGE_SIZES)
+    def test_02_title_retrieve_constant_queries(self, client,
+                                                django_assert_num_queries,
+                                                page_size):
+        titles = create_catalog(page_size)
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[-1].pk}/')
+        assert response.json()['category'], (
+            'Проверьте, что ответ содержит категорию произведения.'
+        )
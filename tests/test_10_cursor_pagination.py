@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+
+def walk_pages(client, url):
+    results = []
+    data = None
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'В режиме курсора ответ не должен содержать `count`.'
+        )
+        results.extend(data['results'])
+        url = data['next']
+    return results, data
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def test_01_titles_cursor_walk(self, client, django_assert_num_queries):
+        create_catalog(25)
+        url = '/api/v1/titles/?pagination=cursor'
+        results, last_page = walk_pages(client, url)
+        assert [title['id'] for title in results] == list(
+            Title.objects.order_by('id').values_list('id', flat=True)
+        ), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` обходит '
+            'все произведения по возрастанию `id` без пропусков и повторов.'
+        )
+        assert last_page['previous'], (
+            'Проверьте, что ответ в режиме курсора содержит ссылку '
+            '`previous`.'
+        )
+        # Произведения с категориями и жанры, без COUNT(*).
+        with django_assert_num_queries(2):
+            client.get(last_page['previous'])
+
+    def test_02_reviews_cursor_walk(self, client, user):
+        title = create_catalog(1)[0]
+        users = [user] + [
+            type(user).objects.create_user(
+                username=f'reviewer{i}', email=f'reviewer{i}@yamdb.fake'
+            )
+            for i in range(14)
+        ]
+        for author in users:
+            Review.objects.create(
+                author=author, title=title, text='text', score=5
+            )
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        results, _ = walk_pages(client, url)
+        assert [review['id'] for review in results] == list(
+            title.reviews.order_by('pub_date', 'id')
+            .values_list('id', flat=True)
+        ), (
+            'Проверьте, что курсорная пагинация отзывов упорядочена по '
+            '`pub_date` и `id`.'
+        )
+
+    def test_03_page_number_stays_default(self, client):
+        create_catalog(12)
+        data = client.get('/api/v1/titles/').json()
+        assert data['count'] == 12 and 'page=2' in data['next'], (
+            'Проверьте, что без параметра `pagination=cursor` сохраняется '
+            'постраничная пагинация.'
+        )
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11CachedCountPagination:
+    url = '/api/v1/titles/'
+
+    def test_01_count_is_cached_and_invalidated(self, client, admin_client,
+                                                django_assert_num_queries):
+        create_catalog(15)
+        assert client.get(self.url).json()['count'] == 15
+        with django_assert_num_queries(2):
+            data = client.get(f'{self.url}?page=2').json()
+        assert data['count'] == 15 and data['next'] is None, (
+            'Проверьте, что `count` берётся из кэша, а `next` определяется '
+            'без COUNT(*).'
+        )
+        assert data['previous'].endswith(self.url), (
+            'Ссылка `previous` со второй страницы должна вести на первую.'
+        )
+
+        Title.objects.first().delete()
+        assert client.get(self.url).json()['count'] == 14, (
+            'Проверьте, что закэшированный `count` сбрасывается при '
+            'изменении произведений.'
+        )
+
+    def test_02_count_depends_on_filters(self, client):
+        create_catalog(12)
+        assert client.get(self.url).json()['count'] == 12
+        data = client.get(f'{self.url}?category=category-0').json()
+        assert data['count'] == 4, (
+            'Проверьте, что ключ кэша `count` учитывает параметры фильтрации.'
+        )
+
+    def test_03_invalid_pages(self, client):
+        create_catalog(3)
+        for page in ('2', '0', 'abc'):
+            response = client.get(f'{self.url}?page={page}')
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        data = client.get(f'{self.url}?page=last').json()
+        assert len(data['results']) == 3
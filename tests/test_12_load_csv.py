@@ -0,0 +1,54 @@
+import csv
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.models import Avg
+
+from reviews.models import Comments, Genre, Review, Title, User
+
+DATA_DIR = Path(settings.BASE_DIR) / 'static' / 'data'
+
+
+def csv_rows(filename):
+    with open(DATA_DIR / filename, encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12LoadCsv:
+
+    def test_01_load_all_tables(self):
+        call_command('load_csv', '--batch-size', '7')
+        expected = (
+            (User, 'users.csv'),
+            (Title, 'titles.csv'),
+            (Title.genre.through, 'genre_title.csv'),
+            (Review, 'review.csv'),
+            (Comments, 'comments.csv'),
+        )
+        for model, filename in expected:
+            assert model.objects.count() == len(csv_rows(filename)), (
+                f'Проверьте, что команда `load_csv` загружает все строки '
+                f'из `{filename}`.'
+            )
+        row = csv_rows('review.csv')[0]
+        review = Review.objects.get(pk=row['id'])
+        assert review.pub_date.isoformat().startswith(row['pub_date'][:19]), (
+            'Проверьте, что `load_csv` сохраняет `pub_date` из файла.'
+        )
+        for title in Title.objects.annotate(avg=Avg('reviews__score')):
+            assert title.rating == title.avg, (
+                'Проверьте, что после загрузки рейтинги произведений '
+                'пересчитаны.'
+            )
+
+    def test_02_truncate_and_append(self):
+        call_command('load_csv')
+        Genre.objects.filter(slug='drama').update(name='Изменённый жанр')
+        call_command('load_csv', '--truncate')
+        assert Genre.objects.get(slug='drama').name == 'Драма'
+        assert Review.objects.count() == len(csv_rows('review.csv'))
+        with pytest.raises(CommandError):
+            call_command('load_csv', '--append')
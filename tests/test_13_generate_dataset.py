@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+ARGS = (
+    '--users', '20', '--categories', '3', '--genres', '5', '--titles', '30',
+    '--reviews', '200', '--comments', '300', '--batch-size', '17',
+)
+
+
+def snapshot():
+    return (
+        list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'score', 'pub_date'
+        )),
+        list(Comments.objects.order_by('id').values_list(
+            'id', 'review_id', 'author_id', 'pub_date'
+        )),
+        list(Title.genre.through.objects.order_by('id').values_list(
+            'title_id', 'genre_id'
+        )),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13GenerateDataset:
+
+    def test_01_counts_and_skew(self):
+        call_command('generate_dataset', *ARGS, '--seed', '1')
+        assert User.objects.count() == 20
+        assert Title.objects.count() == 30
+        assert Review.objects.count() in range(195, 206), (
+            'Проверьте, что `generate_dataset` создаёт заданное число '
+            'отзывов.'
+        )
+        assert Comments.objects.count() == 300
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] == 20 and counts[-1] < counts[0] // 4, (
+            'Проверьте, что популярность произведений неравномерна.'
+        )
+
+    def test_02_same_seed_same_data(self):
+        call_command('generate_dataset', *ARGS, '--seed', '7')
+        first = snapshot()
+        for model in (Comments, Review, Title, Genre, Category, User):
+            model.objects.all().delete()
+        call_command('generate_dataset', *ARGS, '--seed', '7')
+        assert snapshot() == first, (
+            'Проверьте, что при одинаковом `--seed` данные совпадают.'
+        )
@@ -0,0 +1,62 @@
+import pytest
+
+from api.pagination import PagePagination
+from api.views import ReviewViewSet
+from reviews.models import Comments, Review
+from tests.utils import create_catalog
+
+
+def create_discussion(django_user_model, count):
+    title = create_catalog(1)[0]
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{i}', email=f'author{i}@yamdb.fake'
+        )
+        for i in range(count)
+    ]
+    reviews = [
+        Review.objects.create(author=author, title=title, text='отзыв',
+                              score=7)
+        for author in authors
+    ]
+    Comments.objects.bulk_create(
+        Comments(author=author, review=reviews[0], text='комментарий')
+        for author in authors
+    )
+    return title, reviews[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14NestedListQueries:
+
+    def test_01_constant_queries(self, client, monkeypatch,
+                                 django_user_model,
+                                 django_assert_num_queries):
+        monkeypatch.setattr(PagePagination, 'page_size', 100)
+        # Замеряем путь через базу, а не кэш ответов.
+        monkeypatch.setattr(ReviewViewSet, 'cache_actions', ())
+        title, review = create_discussion(django_user_model, 100)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        for url in (reviews_url, comments_url):
+            client.get(url)
+            # Родительский объект и страница вместе с авторами.
+            with django_assert_num_queries(2):
+                data = client.get(url).json()
+            assert len(data['results']) == 100
+            assert data['results'][0]['author'] == 'author0', (
+                f'Проверьте, что `{url}` возвращает username автора.'
+            )
+
+    def test_02_review_text_is_optional(self, client, django_user_model):
+        title, review = create_discussion(django_user_model, 2)
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        comment = client.get(url).json()['results'][0]
+        assert 'review' not in comment, (
+            'Проверьте, что текст отзыва не передаётся с каждым '
+            'комментарием по умолчанию.'
+        )
+        comment = client.get(f'{url}?expand=review').json()['results'][0]
+        assert comment['review'] == 'отзыв', (
+            'Проверьте, что `?expand=review` добавляет текст отзыва.'
+        )
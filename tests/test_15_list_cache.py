@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre
+from tests.utils import create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15VersionedListCache:
+    url = '/api/v1/genres/'
+
+    def test_01_list_is_cached_until_change(self, client, admin_client,
+                                            django_assert_num_queries):
+        create_genre(admin_client)
+        assert client.get(self.url)['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = client.get(self.url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{self.url}` '
+            'обслуживается из кэша.'
+        )
+        assert response.json()['count'] == 3
+
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        names = [item['name'] for item in client.get(self.url).json()[
+            'results'
+        ]]
+        assert 'Трагедия' in names, (
+            'Проверьте, что кэш списка сбрасывается при изменении жанра.'
+        )
+        admin_client.delete(f'{self.url}comedy/')
+        assert client.get(self.url).json()['count'] == 2
+
+    def test_02_search_and_page_are_part_of_key(self, client, admin_client):
+        create_genre(admin_client)
+        client.get(self.url)
+        data = client.get(f'{self.url}?search=Ужас').json()
+        assert data['count'] == 1, (
+            'Проверьте, что параметр `search` учитывается в ключе кэша.'
+        )
+
+    def test_03_stats(self, client, admin_client, user_client):
+        client.get(self.url)
+        client.get(self.url)
+        client.get('/api/v1/categories/')
+        url = '/api/v1/cache/stats/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        stats = admin_client.get(url).json()
+        assert stats['genres'] == {'hits': 1, 'misses': 1, 'stale': 0}
+        assert stats['categories'] == {'hits': 0, 'misses': 1, 'stale': 0}
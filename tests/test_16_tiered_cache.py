@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from api.cache import TieredCache
+from reviews.models import Review
+from tests.utils import create_catalog
+
+
+def make_cache(**kwargs):
+    options = {
+        'max_bytes': 1024 * 1024,
+        'fresh_seconds': 60,
+        'stale_seconds': 60,
+        'lock_seconds': 2,
+    }
+    options.update(kwargs)
+    return TieredCache(**options)
+
+
+class Test16TieredCache:
+
+    def test_01_local_lru_is_bounded_by_size(self):
+        tiered = make_cache(max_bytes=2000)
+        for i in range(10):
+            tiered.get_or_set(f'lru-{i}', lambda: 'x' * 500)
+        stats = tiered.local_stats()
+        assert 0 < stats['bytes'] <= 2000 and stats['entries'] < 10, (
+            'Проверьте, что локальный уровень вытесняет записи по размеру.'
+        )
+        assert tiered._local_get('lru-0') is None
+        assert tiered._local_get('lru-9') is not None
+
+    def test_02_shared_tier_serves_other_processes(self):
+        first, second = make_cache(), make_cache()
+        first.get_or_set('shared', lambda: 'value')
+        value, event = second.get_or_set('shared', pytest.fail)
+        assert (value, event) == ('value', 'hits'), (
+            'Проверьте, что значение из общего кэша доступно другим '
+            'процессам без пересчёта.'
+        )
+
+    def test_03_single_flight(self):
+        tiered = make_cache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    tiered.get_or_set('flight', compute)[0]
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что значение пересчитывает только один поток.'
+        )
+        assert results == ['value'] * 8
+
+    def test_04_stale_while_revalidate(self):
+        tiered = make_cache(fresh_seconds=0.05)
+        tiered.get_or_set('swr', lambda: 'old')
+        time.sleep(0.1)
+        # Пересчёт уже идёт в другом процессе.
+        cache.add('lock:swr', 1)
+        assert tiered.get_or_set('swr', pytest.fail) == ('old', 'stale')
+        cache.delete('lock:swr')
+        assert tiered.get_or_set('swr', lambda: 'new') == ('new', 'misses')
+        assert tiered.get_or_set('swr', pytest.fail) == ('new', 'hits')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TitleResponseCache:
+
+    def test_01_title_detail_cached_and_invalidated(self, client, user):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.pk}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['rating'] is None
+
+        Review.objects.create(author=user, title=title, text='Да', score=9)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 9, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
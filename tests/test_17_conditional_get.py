@@ -0,0 +1,107 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import http_date
+
+from reviews.models import Review
+from tests.utils import create_catalog, create_genre
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время: секунды отсчитываются от now[0]."""
+    now = [int(time.time()) + 10 + 0.2]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ConditionalGet:
+
+    def test_01_if_none_match(self, client, admin_client,
+                              django_assert_num_queries):
+        create_genre(admin_client)
+        for url in ('/api/v1/genres/', '/api/v1/categories/',
+                    '/api/v1/titles/'):
+            response = client.get(url)
+            etag = response['ETag']
+            assert etag.startswith('"') and response['Last-Modified'], (
+                f'Проверьте, что ответ `{url}` содержит ETag и '
+                'Last-Modified.'
+            )
+            with django_assert_num_queries(0):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что `{url}` отвечает 304 на совпадающий '
+                '`If-None-Match`.'
+            )
+            assert response['ETag'] == etag
+
+    def test_02_etag_changes_with_data(self, client, user):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        Review.objects.create(author=user, title=title, text='Да', score=8)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после нового отзыва ETag списка меняется.'
+        )
+        assert response['ETag'] != etag
+        assert response.json()['count'] == 1
+
+    def test_03_if_modified_since(self, client, clock):
+        create_catalog(1)
+        url = '/api/v1/titles/'
+        client.get(url)
+        # Время изменения объявляется, когда его секунда закончилась.
+        clock[0] += 1
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что `If-Modified-Since` обрабатывается.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT'
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_04_etag_changes_with_author(self, client, user_client, user):
+        title = create_catalog(1)[0]
+        Review.objects.create(author=user, title=title, text='Да', score=8)
+        urls = (
+            (f'/api/v1/titles/{title.pk}/reviews/', {}),
+            ('/api/v1/reviews/search/', {'search': 'да'}),
+        )
+        etags = [client.get(url, params)['ETag'] for url, params in urls]
+        response = user_client.patch(
+            '/api/v1/users/me/', {'username': 'renamed'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        for (url, params), etag in zip(urls, etags):
+            response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что ETag `{url}` меняется при переименовании '
+                'автора.'
+            )
+            assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_05_change_in_same_second(self, client, admin_client, clock):
+        url = '/api/v1/categories/'
+        last_modified = client.get(url)['Last-Modified']
+        clock[0] += 0.5
+        response = admin_client.post(
+            url, data={'name': 'Новая', 'slug': 'new'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение в ту же секунду, что и прошлый '
+            'запрос, не даёт 304 на `If-Modified-Since`.'
+        )
+        assert response.json()['count'] == 1
+        assert response['Last-Modified'] == http_date(clock[0] - 1)
+        clock[0] += 1
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.db.models import F
+
+from api.views import ReviewViewSet
+from reviews.models import Review
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18OptimisticConcurrency:
+
+    def test_01_title_if_match(self, admin_client):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = admin_client.get(url)['ETag']
+        assert etag == f'"title-{title.pk}-v1"', (
+            'Проверьте, что ответ с произведением содержит ETag его версии.'
+        )
+        response = admin_client.patch(
+            url, data={'name': 'Первая правка'},
+            format='json', HTTP_IF_MATCH=etag,
+        )
+        assert response.status_code == HTTPStatus.OK
+        new_etag = response['ETag']
+        assert new_etag == f'"title-{title.pk}-v2"'
+        assert admin_client.get(url)['ETag'] == new_etag, (
+            'Проверьте, что закэшированный ответ отдаёт ETag новой версии.'
+        )
+
+        response = admin_client.patch(
+            url, data={'name': 'Вторая правка'},
+            format='json', HTTP_IF_MATCH=etag,
+        )
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED, (
+            'Проверьте, что изменение по устаревшему `If-Match` '
+            'возвращает 412.'
+        )
+        title.refresh_from_db()
+        assert title.name == 'Первая правка'
+        assert title.version == 2
+
+        response = admin_client.delete(url, HTTP_IF_MATCH=etag)
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+        response = admin_client.delete(url, HTTP_IF_MATCH=new_etag)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_02_without_if_match(self, user_client, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            author=user, title=title, text='отзыв', score=5
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        for score in (6, 7):
+            response = user_client.patch(
+                url, data={'score': score}, format='json'
+            )
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что изменение без `If-Match` не требует версии.'
+            )
+        review.refresh_from_db()
+        assert review.version == 3
+        assert response['ETag'] == f'"review-{review.pk}-v3"'
+        title.refresh_from_db()
+        assert title.rating == 7
+
+    def test_03_stale_instance(self, admin_client, user):
+        url = f'/api/v1/users/{user.username}/'
+        etag = admin_client.get(url)['ETag']
+        # Параллельное изменение той же строки.
+        user.first_name = 'Другой'
+        user.save()
+        response = admin_client.patch(
+            url, data={'bio': 'новое'}, format='json',
+            HTTP_IF_MATCH=etag,
+        )
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+        response = admin_client.patch(
+            url, data={'bio': 'новое'}, format='json',
+            HTTP_IF_MATCH='*',
+        )
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert (user.first_name, user.bio) == ('Другой', 'новое')
+
+    def test_04_concurrent_write_without_if_match(self, user_client, user,
+                                                  monkeypatch):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            author=user, title=title, text='отзыв', score=5
+        )
+        get_object = ReviewViewSet.get_object
+
+        def get_object_then_concurrent_write(view):
+            obj = get_object(view)
+            Review.objects.filter(pk=obj.pk).update(
+                version=F('version') + 1
+            )
+            return obj
+
+        monkeypatch.setattr(
+            ReviewViewSet, 'get_object', get_object_then_concurrent_write
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        response = user_client.patch(url, data={'score': 9}, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что запрос без `If-Match` не получает 412 из-за '
+            'параллельного изменения.'
+        )
+        response = user_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19FullTextSearch:
+
+    def test_01_titles(self, client):
+        title, other, renamed = create_catalog(3)
+        Title.objects.filter(pk=title.pk).update(
+            name='Ёжик в тумане', description='Мультфильм о фильмах'
+        )
+        Title.objects.filter(pk=other.pk).update(
+            name='Фильмы ужасов', description='Страшно'
+        )
+        renamed.name = 'Фильм без названия'
+        renamed.save()
+
+        response = client.get('/api/v1/titles/', {'search': 'фильм'})
+        assert response.status_code == HTTPStatus.OK
+        names = [item['name'] for item in response.json()['results']]
+        assert sorted(names[:2]) == [
+            'Фильм без названия', 'Фильмы ужасов'
+        ] and names[2:] == ['Ёжик в тумане'], (
+            'Проверьте, что `search` ищет слова по префиксу и ставит '
+            'совпадения в названии выше совпадений в описании.'
+        )
+        response = client.get('/api/v1/titles/', {'search': 'ЕЖИК туман'})
+        assert [item['id'] for item in response.json()['results']] == [
+            title.pk
+        ], 'Проверьте, что поиск не зависит от регистра и буквы «ё».'
+
+        renamed.delete()
+        response = client.get('/api/v1/titles/', {'search': 'фильм'})
+        assert response.json()['count'] == 2
+        for text in ('"*(', ''):
+            response = client.get('/api/v1/titles/', {'search': text})
+            assert response.json()['count'] == 2, (
+                'Проверьте, что поиск без слов не фильтрует список, а '
+                'синтаксис FTS5 во вводе не вызывает ошибку.'
+            )
+
+    def test_02_reviews(self, client, user, admin):
+        first, second = create_catalog(2)
+        Review.objects.create(
+            author=user, title=first, text='Сильный финал', score=8
+        )
+        review = Review.objects.create(
+            author=admin, title=second, text='Скучный сюжет', score=3
+        )
+        url = '/api/v1/reviews/search/'
+        response = client.get(url, {'search': 'сюж'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден.'
+        )
+        results = response.json()['results']
+        assert [item['id'] for item in results] == [review.pk]
+        assert results[0]['title'] == second.name
+
+        review.text = 'Затянутое начало'
+        review.save()
+        response = client.get(url, {'search': 'сюж'})
+        assert response.json()['count'] == 0, (
+            'Проверьте, что индекс обновляется при изменении отзыва.'
+        )
+
+    def test_03_cursor_keeps_relevance(self, client):
+        titles = create_catalog(12)
+        for i, title in enumerate(titles):
+            # Чем больше слов «фильм» в описании, тем выше релевантность.
+            Title.objects.filter(pk=title.pk).update(
+                name=f'Фильм {i}', description=' '.join(['фильм'] * (i % 5))
+            )
+        expected = [
+            item['id'] for item in client.get(
+                '/api/v1/titles/', {'search': 'фильм'}
+            ).json()['results']
+        ]
+        assert expected != sorted(expected)
+        response = client.get(
+            '/api/v1/titles/', {'search': 'фильм', 'pagination': 'cursor'}
+        )
+        assert [item['id'] for item in response.json()['results']] == (
+            expected
+        ), 'Проверьте, что курсор не теряет порядок по релевантности.'
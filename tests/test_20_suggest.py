@@ -0,0 +1,141 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from api.suggest import PrefixIndex, Suggester, index_keys
+from reviews.models import Genre, Review, Title
+from tests.utils import create_catalog
+
+
+def test_prefix_index():
+    index = PrefixIndex()
+    index.add(1, 'Ёжик в тумане', 'ежик', 5)
+    index.add(2, 'Туманность Андромеды', 'туманность', 1)
+    index.add(3, 'Тумба', 'тумба', 3)
+    assert index.search('туман', 10) == ['ежик', 'туманность']
+    assert index.search('тум', 2) == ['ежик', 'тумба']
+    index.adjust(2, 10)
+    assert index.search('туман', 10) == ['туманность', 'ежик']
+    index.add(1, 'Ёжик', 'ежик')
+    assert index.search('туман', 10) == ['туманность']
+    assert index.search('ежик', 10) == ['ежик']
+    index.remove(2)
+    assert index.search('т', 10) == ['тумба']
+
+
+def test_prefix_index_built_once():
+    words = ['альфа', 'бета', 'гамма', 'дельта', 'эпсилон']
+    entries = [
+        (pk, f'{words[pk % 5]} {words[pk // 5 % 5]} {pk}', pk, pk % 7)
+        for pk in range(200)
+    ]
+    index = PrefixIndex(entries)
+
+    def expected(prefix, limit):
+        found = [
+            (-index.items[pk][1], index.items[pk][0], pk)
+            for pk in index.items
+            if any(key.startswith(prefix)
+                   for key in index_keys(index.items[pk][0]))
+        ]
+        return [pk for _, _, pk in sorted(found)[:limit]]
+
+    for prefix in ('а', 'бета г', 'дельта', '1', 'я'):
+        assert index.search(prefix, 10) == expected(prefix, 10)
+    index.adjust(3, 100)
+    index.remove(6)
+    index.add(7, 'Бета новая', 7)
+    index.add(500, 'Гамма свежая', 500, 50)
+    for prefix in ('б', 'г', 'гамма с', 'н', 'дельта'):
+        assert index.search(prefix, 10) == expected(prefix, 10)
+    assert not index.needs_rebuild
+    index.max_pending = 2
+    assert index.needs_rebuild
+
+    index.max_results = 3
+    for prefix in ('а', 'б', 'г', 'д', 'э'):
+        index.search(prefix, 5)
+    assert len(index.results) == 3
+
+
+def test_suggester_rebuilds_in_background():
+    loaded = threading.Event()
+    release = threading.Event()
+    entries = [(1, 'Туман', 'туман', 1)]
+
+    def load():
+        if suggester.indexes:
+            loaded.set()
+            release.wait(5)
+        return list(entries)
+
+    suggester = Suggester({'titles': load}, rebuild_seconds=0)
+    assert suggester.suggest('titles', 'тум', 10) == ['туман']
+    entries.append((2, 'Тумба', 'тумба', 0))
+    assert suggester.suggest('titles', 'тум', 10) == ['туман']
+    assert loaded.wait(5)
+    # Запросы обслуживает прежний индекс, а изменение попадёт и в новый.
+    suggester.update('titles', 'add', 3, 'Тундра', 'тундра', 5)
+    assert suggester.suggest('titles', 'ту', 10) == ['тундра', 'туман']
+    suggester.rebuild_seconds = 60
+    release.set()
+    suggester.build_locks['titles'].acquire(timeout=5)
+    assert suggester.suggest('titles', 'ту', 10) == [
+        'тундра', 'туман', 'тумба'
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Suggest:
+    url = '/api/v1/suggest/'
+
+    def test_01_ranked_by_reviews(self, client, user, admin,
+                                  django_assert_num_queries):
+        first, second, third = create_catalog(3)
+        Title.objects.filter(pk=third.pk).update(name='Сияние')
+        response = client.get(self.url, {'q': 'произв'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.url}` не найден.'
+        )
+        assert [item['id'] for item in response.json()['titles']] == [
+            first.pk, second.pk
+        ]
+        Review.objects.create(author=user, title=second, text='да', score=5)
+        with django_assert_num_queries(0):
+            response = client.get(self.url, {'q': 'Произведение 1'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            second.pk
+        ]
+        with django_assert_num_queries(0):
+            response = client.get(self.url, {'q': 'произв', 'limit': 1})
+        assert response.json()['titles'] == [
+            {'id': second.pk, 'name': second.name}
+        ], 'Проверьте, что подсказки ранжируются по числу отзывов.'
+
+        second.name = 'Сияние 2'
+        second.save()
+        response = client.get(self.url, {'q': 'сиян'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            second.pk, third.pk
+        ], 'Проверьте, что индекс обновляется при изменении произведения.'
+        first.delete()
+        response = client.get(self.url, {'q': 'произв'})
+        assert response.json()['titles'] == []
+
+    def test_02_kinds(self, client, admin_client):
+        create_catalog(1)
+        Genre.objects.create(name='Жутик', slug='zhutik')
+        response = client.get(self.url, {'q': 'жу'})
+        data = response.json()
+        assert 'users' not in data, (
+            'Проверьте, что имена пользователей не подсказываются анонимам.'
+        )
+        assert data['genres'] == [{'name': 'Жутик', 'slug': 'zhutik'}]
+        assert data['categories'] == []
+        response = admin_client.get(self.url, {'q': 'testad'})
+        assert response.json()['users'] == [{'username': 'TestAdmin'}]
+        response = admin_client.get(self.url, {'q': '  '})
+        assert response.json() == {
+            'titles': [], 'genres': [], 'categories': [], 'users': []
+        }
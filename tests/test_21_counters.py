@@ -0,0 +1,143 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Comments, Review, Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Counters:
+
+    def test_01_counters_in_api(self, client, user_client, user, admin):
+        title = create_catalog(1)[0]
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(reviews_url, data={'text': 'a',
+                                                       'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        review_id = response.json()['id']
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        for _ in range(2):
+            user_client.post(comments_url, data={'text': 'комментарий'})
+        Comments.objects.create(
+            author=admin, review_id=review_id, text='ещё'
+        )
+
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['review_count'] == 1, (
+            'Проверьте, что ответ с произведением содержит `review_count`.'
+        )
+        response = client.get(f'{reviews_url}{review_id}/')
+        assert response.json()['comment_count'] == 3, (
+            'Проверьте, что ответ с отзывом содержит `comment_count`.'
+        )
+
+        admin.delete()
+        assert Review.objects.get(pk=review_id).comment_count == 2, (
+            'Проверьте, что каскадное удаление комментариев уменьшает '
+            '`comment_count`.'
+        )
+        comment_id = Comments.objects.filter(review_id=review_id).first().pk
+        user_client.delete(f'{comments_url}{comment_id}/')
+        assert Review.objects.get(pk=review_id).comment_count == 1
+        user.delete()
+        assert Title.objects.get(pk=title.pk).review_count == 0
+
+    def test_02_save_keeps_counters(self, user, admin):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            author=user, title=title, text='a', score=5
+        )
+        stale_title = Title.objects.get(pk=title.pk)
+        stale_review = Review.objects.get(pk=review.pk)
+        Review.objects.create(author=admin, title=title, text='b', score=9)
+        Comments.objects.create(author=admin, review=review, text='c')
+
+        stale_title.name = 'Новое название'
+        stale_title.save()
+        stale_review.text = 'исправлено'
+        stale_review.save()
+        title.refresh_from_db()
+        review.refresh_from_db()
+        assert (title.name, title.review_count, title.rating) == (
+            'Новое название', 2, 7
+        ), 'Сохранение произведения не должно затирать счётчики.'
+        assert (review.text, review.comment_count) == ('исправлено', 1)
+
+    def test_03_reconcile_command(self, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            author=user, title=title, text='a', score=5
+        )
+        Comments.objects.bulk_create(
+            Comments(author=user, review=review, text='c') for _ in range(3)
+        )
+        Title.objects.update(review_count=5)
+        with pytest.raises(CommandError):
+            call_command('reconcile_counters', '--check')
+        call_command('reconcile_counters', '--chunk-size', '1')
+        call_command('reconcile_counters', '--check')
+        review.refresh_from_db()
+        title.refresh_from_db()
+        assert (title.review_count, review.comment_count) == (1, 3)
+
+    def test_04_cached_lists_see_comments(self, client, user_client, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            author=user, title=title, text='Сильный финал', score=8
+        )
+        urls = (
+            (f'/api/v1/titles/{title.pk}/reviews/', {}),
+            ('/api/v1/reviews/search/', {'search': 'финал'}),
+        )
+        for url, params in urls:
+            response = client.get(url, params)
+            assert response.json()['results'][0]['comment_count'] == 0
+        user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+            data={'text': 'комментарий'},
+        )
+        for url, params in urls:
+            response = client.get(url, params)
+            assert response.json()['results'][0]['comment_count'] == 1, (
+                f'Проверьте, что кэш `{url}` сбрасывается при изменении '
+                'комментариев.'
+            )
+
+    def test_05_reviews_ordered_by_comments(self, client,
+                                            django_user_model):
+        title = create_catalog(1)[0]
+        for i in range(12):
+            author = django_user_model.objects.create(
+                username=f'author{i}', email=f'author{i}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                author=author, title=title, text='a', score=5
+            )
+            Review.objects.filter(pk=review.pk).update(comment_count=i % 4)
+        expected = [
+            pk for _, pk in sorted(
+                Review.objects.values_list('comment_count', 'id'),
+                reverse=True,
+            )
+        ]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.get(url, {'ordering': '-comment_count'})
+        assert [item['id'] for item in response.json()['results']] == (
+            expected[:10]
+        ), 'Проверьте сортировку отзывов по `comment_count`.'
+        found = []
+        url = f'{url}?pagination=cursor&ordering=-comment_count'
+        while url:
+            data = client.get(url).json()
+            found.extend(item['id'] for item in data['results'])
+            url = data['next']
+        assert found == expected
+        plan = Review.objects.filter(title=title).order_by(
+            '-comment_count', '-id'
+        ).explain()
+        assert 'review_title_comments_idx' in plan, (
+            'Проверьте, что сортировка по `comment_count` идёт по индексу.'
+        )
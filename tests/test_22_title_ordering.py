@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+def prepare_titles(count):
+    titles = create_catalog(count)
+    for i, title in enumerate(titles):
+        # Повторы значений и произведения без оценок.
+        rating = None if i % 4 == 0 else float(i % 3 + 5)
+        Title.objects.filter(pk=title.pk).update(
+            rating=rating, review_count=i % 5, year=2000 + i % 3,
+        )
+    return titles
+
+
+def walk(client, url, key='next'):
+    """Страницы по ссылкам `key`: списки id в порядке обхода."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        pages.append([item['id'] for item in data['results']])
+        url = data[key]
+    return pages, data
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleOrdering:
+
+    @pytest.mark.parametrize('ordering', [
+        'rating', '-rating', 'review_count', '-year', 'name', '-id',
+    ])
+    def test_01_cursor_walk(self, client, ordering):
+        prepare_titles(23)
+        field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        expected = sorted(
+            Title.objects.values_list(field, 'id'),
+            # NULL меньше любого значения, как в SQL.
+            key=lambda row: (row[0] is not None, row[0] or 0, row[1]),
+            reverse=descending,
+        )
+        expected = [pk for _, pk in expected]
+
+        response = client.get('/api/v1/titles/', {'ordering': ordering})
+        assert [item['id'] for item in response.json()['results']] == (
+            expected[:10]
+        ), f'Проверьте сортировку `ordering={ordering}` по страницам.'
+
+        pages, last_page = walk(
+            client,
+            f'/api/v1/titles/?pagination=cursor&ordering={ordering}'
+        )
+        assert sum(pages, []) == expected, (
+            f'Проверьте, что курсор с `ordering={ordering}` обходит все '
+            'произведения без пропусков и повторов.'
+        )
+        backward, _ = walk(client, last_page['previous'], key='previous')
+        assert backward == pages[-2::-1], (
+            'Проверьте, что ссылки `previous` проходят те же страницы '
+            'в обратном порядке.'
+        )
+
+    def test_02_previous_pages(self, client):
+        prepare_titles(23)
+        url = '/api/v1/titles/?pagination=cursor&ordering=-rating'
+        first = client.get(url).json()
+        assert first['previous'] is None
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+        )
+
+    def test_03_invalid(self, client):
+        prepare_titles(3)
+        response = client.get('/api/v1/titles/', {'ordering': 'description'})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/titles/', {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
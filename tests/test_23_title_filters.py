@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+
+def ids(response):
+    assert response.status_code == HTTPStatus.OK
+    return sorted(item['id'] for item in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TitleFilters:
+    url = '/api/v1/titles/'
+
+    def test_01_genres(self, client):
+        # Жанры i-го произведения: genre-0 ... genre-(i % 3).
+        titles = create_catalog(6)
+        pks = [title.pk for title in titles]
+        response = client.get(self.url, {'genre': 'genre-0,genre-1'})
+        assert ids(response) == pks, (
+            'Проверьте, что фильтр `genre` принимает несколько слагов и '
+            'не дублирует произведения с несколькими подходящими жанрами.'
+        )
+        assert response.json()['count'] == 6
+        response = client.get(self.url, {'genre': 'genre-2,genre-1'})
+        assert ids(response) == [pks[1], pks[2], pks[4], pks[5]]
+        response = client.get(
+            self.url, {'genre': 'genre-2,genre-1', 'genre_mode': 'all'}
+        )
+        assert ids(response) == [pks[2], pks[5]], (
+            'Проверьте, что `genre_mode=all` требует все жанры.'
+        )
+        response = client.get(
+            self.url, {'genre': 'genre-1', 'genre_mode': 'some'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_categories_and_ranges(self, client):
+        titles = create_catalog(6)
+        pks = [title.pk for title in titles]
+        for i, title in enumerate(titles):
+            Title.objects.filter(pk=title.pk).update(
+                year=2000 + i, rating=None if i == 0 else i,
+            )
+        response = client.get(
+            self.url, {'category': 'category-0,category-2'}
+        )
+        assert ids(response) == [pks[0], pks[2], pks[3], pks[5]]
+        response = client.get(self.url, {'year_min': 2002, 'year_max': 2004})
+        assert ids(response) == pks[2:5]
+        response = client.get(self.url, {'rating_min': 4})
+        assert ids(response) == pks[4:]
+        response = client.get(
+            self.url, {'rating_max': 3, 'category': 'category-0'}
+        )
+        assert ids(response) == [pks[3]]
+
+    def test_03_rating_count_follows_reviews(self, client, user):
+        titles = create_catalog(13)
+        for title in titles:
+            Review.objects.create(author=user, title=title, text='a',
+                                  score=8 if title in titles[:11] else 2)
+        response = client.get(self.url, {'rating_min': 5})
+        assert response.json()['count'] == 11
+        Review.objects.filter(title__in=titles[11:]).delete()
+        for title in titles[11:]:
+            Review.objects.create(author=user, title=title, text='a',
+                                  score=7)
+        response = client.get(
+            self.url, {'rating_min': 5, 'ordering': 'name'}
+        )
+        assert response.json()['count'] == 13, (
+            'Проверьте, что число произведений с фильтром по рейтингу '
+            'пересчитывается после новых отзывов.'
+        )
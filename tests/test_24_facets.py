@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_catalog
+
+
+def counts(items, key):
+    return {item[key]: item['count'] for item in items}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Facets:
+    url = '/api/v1/titles/'
+
+    def test_01_facets(self, client):
+        # Жанры i-го произведения: genre-0 ... genre-(i % 3),
+        # категория: category-(i % 3).
+        titles = create_catalog(6)
+        for i, title in enumerate(titles):
+            Title.objects.filter(pk=title.pk).update(year=1995 + i * 3)
+        response = client.get(self.url)
+        assert 'facets' not in response.json(), (
+            'Проверьте, что фасеты считаются только по запросу.'
+        )
+        response = client.get(self.url, {'facets': 'genre,category,year'})
+        assert response.status_code == HTTPStatus.OK
+        facets = response.json()['facets']
+        assert counts(facets['genre'], 'slug') == {
+            'genre-0': 6, 'genre-1': 4, 'genre-2': 2,
+        }
+        assert facets['genre'][0] == {
+            'slug': 'genre-0', 'name': 'Жанр 0', 'count': 6,
+        }
+        assert counts(facets['category'], 'slug') == {
+            'category-0': 2, 'category-1': 2, 'category-2': 2,
+        }
+        assert facets['year'] == [
+            {'from': 1990, 'to': 1999, 'count': 2},
+            {'from': 2000, 'to': 2009, 'count': 3},
+            {'from': 2010, 'to': 2019, 'count': 1},
+        ]
+
+    def test_02_facets_follow_filters(self, client):
+        create_catalog(6)
+        response = client.get(
+            self.url,
+            {'genre': 'genre-2', 'facets': 'genre, category', 'page_size': 1},
+        )
+        facets = response.json()['facets']
+        assert set(facets) == {'genre', 'category'}, (
+            'Проверьте, что возвращаются только запрошенные фасеты.'
+        )
+        assert counts(facets['genre'], 'slug') == {
+            'genre-0': 2, 'genre-1': 2, 'genre-2': 2,
+        }, 'Проверьте, что фасеты считаются по всей отфильтрованной выборке.'
+        assert counts(facets['category'], 'slug') == {'category-2': 2}
+
+    def test_03_one_query_per_facet(self, client):
+        create_catalog(6)
+        with CaptureQueriesContext(connection) as plain:
+            client.get(self.url, {'category': 'category-1'})
+        with CaptureQueriesContext(connection) as faceted:
+            client.get(self.url, {'category': 'category-1',
+                                  'facets': 'genre,category,year'})
+        assert len(faceted) == len(plain) + 3, (
+            'Проверьте, что каждый фасет считается одним запросом с GROUP BY.'
+        )
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from http import HTTPStatus
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
+
+from reviews import outbox
+from reviews.models import OutboxEmail, User
+
+
+class BrokenBackend(BaseEmailBackend):
+
+    def send_messages(self, messages):
+        raise SMTPServerDisconnected('Соединение закрыто.')
+
+
+def send_outbox(*args):
+    call_command('send_outbox', '--once', '--workers', '1', '--window', '0',
+                 *args)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Outbox:
+
+    def test_01_signup_enqueues(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'outbox_user', 'email': 'outbox@yamdb.fake'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо в запросе.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'outbox@yamdb.fake'
+        assert email.status == OutboxEmail.PENDING
+        send_outbox()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['outbox@yamdb.fake']
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert email.attempts == 1
+        send_outbox()
+        assert len(mail.outbox) == 1, 'Письмо не должно уйти дважды.'
+
+    def test_02_batches(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        for i in range(7):
+            outbox.enqueue('Тема', 'Текст', f'user{i}@yamdb.fake')
+        send_outbox('--batch-size', '2')
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            f'user{i}@yamdb.fake' for i in range(7)
+        )
+        assert not OutboxEmail.objects.exclude(status=OutboxEmail.SENT)
+
+    def test_03_claim(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        for i in range(3):
+            outbox.enqueue('Тема', 'Текст', f'user{i}@yamdb.fake')
+        first = outbox.claim(2)
+        second = outbox.claim(2)
+        assert len(first) == 2 and len(second) == 1
+        assert not {email.pk for email in first} & {
+            email.pk for email in second
+        }, 'Проверьте, что взятые воркером письма недоступны другим.'
+        assert outbox.claim(2) == []
+        # Аренда упавшего воркера истекает, и письма снова доступны.
+        OutboxEmail.objects.update(locked_until=timezone.now())
+        assert len(outbox.claim(5)) == 3
+
+    def test_04_retries(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = outbox.enqueue('Тема', 'Текст', 'user@yamdb.fake')
+        assert outbox.send(outbox.claim(1), BrokenBackend()) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTPServerDisconnected' in email.last_error
+        delay = email.next_attempt_at - timezone.now()
+        assert timedelta(seconds=20) < delay <= timedelta(seconds=36), (
+            'Проверьте, что повтор откладывается на EMAIL_OUTBOX_RETRY_SECONDS.'
+        )
+        assert outbox.claim(1) == []
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        outbox.send(outbox.claim(1), BrokenBackend())
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS письмо не '
+            'отправляется повторно.'
+        )
+        assert email.body == ''
+        assert outbox.retry_delay(20) <= timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS * 1.2
+        )
+
+    def test_05_signup_is_atomic(self, client, settings, monkeypatch):
+        settings.EMAIL_OUTBOX_EAGER = False
+
+        def broken_enqueue(*args):
+            raise DatabaseError('outbox недоступен')
+
+        monkeypatch.setattr(outbox, 'enqueue', broken_enqueue)
+        with pytest.raises(DatabaseError):
+            client.post(
+                '/api/v1/auth/signup/',
+                data={'username': 'outbox_user', 'email': 'outbox@yamdb.fake'},
+            )
+        assert not User.objects.filter(username='outbox_user').exists(), (
+            'Проверьте, что пользователь и письмо с кодом сохраняются '
+            'в одной транзакции.'
+        )
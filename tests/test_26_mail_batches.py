@@ -0,0 +1,166 @@
+import socket
+from http import HTTPStatus
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend
+
+from reviews import outbox
+from reviews.mail import get_mail_stats, pool
+from reviews.models import OutboxEmail, User
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+    calls = []
+
+    def open(self):
+        if not getattr(self, 'is_open', False):
+            self.is_open = True
+            CountingBackend.opened += 1
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        CountingBackend.calls.append(len(messages))
+        return super().send_messages(messages)
+
+
+class RefusingBackend(EmailBackend):
+    """Отказывает на письме для refused@yamdb.fake."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            message.message()
+            if 'refused@yamdb.fake' in message.to:
+                raise SMTPRecipientsRefused({})
+            mail.outbox.append(message)
+        return len(messages)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def enqueue(*recipients):
+    return [
+        outbox.enqueue('Тема', 'Текст', recipient) for recipient in recipients
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26MailBatches:
+
+    def test_01_connection_reuse(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_BACKEND = 'tests.test_26_mail_batches.CountingBackend'
+        CountingBackend.opened = 0
+        CountingBackend.calls = []
+        enqueue(*(f'user{i}@yamdb.fake' for i in range(5)))
+        assert outbox.deliver(batch_size=2) == (5, 0)
+        assert CountingBackend.calls == [2, 2, 1], (
+            'Проверьте, что пачка отправляется одним вызовом send_messages().'
+        )
+        enqueue('late@yamdb.fake')
+        outbox.deliver()
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что соединение берётся из пула и не открывается '
+            'заново для каждой пачки.'
+        )
+
+    def test_02_eager_signups_share_connection(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_26_mail_batches.CountingBackend'
+        CountingBackend.opened = 0
+        for i in range(3):
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': f'user{i}', 'email': f'user{i}@yamdb.fake',
+            })
+            assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 3
+        assert CountingBackend.opened == 1
+
+    def test_03_partial_failure(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        first, refused, last = enqueue(
+            'first@yamdb.fake', 'refused@yamdb.fake', 'last@yamdb.fake'
+        )
+        assert outbox.send(outbox.claim(3), RefusingBackend()) == (1, 1)
+        states = {
+            email.pk: (email.status, email.attempts, email.claim)
+            for email in OutboxEmail.objects.all()
+        }
+        assert states[first.pk] == (OutboxEmail.SENT, 1, '')
+        assert states[refused.pk] == (OutboxEmail.PENDING, 1, ''), (
+            'Проверьте, что попытка засчитывается письму, на котором '
+            'прервалась отправка.'
+        )
+        assert states[last.pk] == (OutboxEmail.PENDING, 0, ''), (
+            'Проверьте, что неначатые письма возвращаются в очередь '
+            'без траты попытки.'
+        )
+        assert [email.pk for email in outbox.claim(3)] == [last.pk]
+
+    def test_04_collect(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        enqueue('first@yamdb.fake')
+        assert len(outbox.collect(5, 0)) == 1
+        enqueue('second@yamdb.fake', 'third@yamdb.fake')
+        assert len(outbox.collect(2, 0.01)) == 2
+
+    def test_05_stats(self, admin_client, user_client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        enqueue(*(f'user{i}@yamdb.fake' for i in range(3)))
+        outbox.deliver(batch_size=2)
+        enqueue('first@yamdb.fake', 'refused@yamdb.fake')
+        outbox.send(outbox.claim(2), RefusingBackend())
+        # send_outbox работает в отдельном процессе: кэш API его
+        # счётчиков не видит.
+        cache.clear()
+        stats = get_mail_stats()
+        assert stats['batches'] == 3
+        assert stats['messages'] == 5
+        assert stats['sent'] == 4
+        assert stats['failed'] == 1
+        assert stats['avg_batch_size'] == round(5 / 3, 2)
+        assert stats['avg_send_ms'] >= 0
+        response = admin_client.get('/api/v1/mail/stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == stats
+        response = user_client.get('/api/v1/mail/stats/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_06_unreachable_server(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = closed_port()
+        settings.EMAIL_TIMEOUT = 1
+        first, second = enqueue('first@yamdb.fake', 'second@yamdb.fake')
+        call_command('send_outbox', '--once', '--workers', '1',
+                     '--window', '0')
+        for email in OutboxEmail.objects.all():
+            assert email.status == OutboxEmail.PENDING
+            assert email.attempts == 1, (
+                'Проверьте, что ошибка подключения засчитывается пачке.'
+            )
+            assert email.claim == ''
+            assert email.next_attempt_at is not None
+            assert 'ConnectionRefusedError' in email.last_error
+
+        settings.EMAIL_OUTBOX_EAGER = True
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newuser', 'email': 'newuser@yamdb.fake',
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что недоступный SMTP-сервер не ломает регистрацию.'
+        )
+        assert User.objects.filter(username='newuser').exists()
+        assert OutboxEmail.objects.get(
+            recipient='newuser@yamdb.fake'
+        ).attempts == 1
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken
+from reviews import confirmation
+from tests.utils import create_catalog
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27StatelessJWT:
+
+    def test_01_no_user_query(self, admin):
+        client = token_client(admin)
+        assert client.get('/api/v1/cache/stats/').status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 0, (
+            'Проверьте, что роль администратора берётся из токена, '
+            'а не из базы.'
+        )
+
+    def test_02_token_endpoint_claims(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': confirmation.issue(user),
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == 'user'
+        assert token['username'] == user.username
+        assert token['token_version'] == 0, (
+            'Проверьте, что токен содержит роль и версию токенов.'
+        )
+        response = client.get(
+            '/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email, (
+            'Проверьте, что `/users/me/` отдаёт все поля пользователя.'
+        )
+
+    def test_03_role_change_revokes(self, admin, user):
+        old_client = token_client(user)
+        assert old_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        response = token_client(admin).patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'},
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert old_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что смена роли отзывает выданные токены.'
+        user.refresh_from_db()
+        assert user.token_version == 1
+        response = token_client(user).get('/api/v1/users/me/')
+        assert response.json()['role'] == 'moderator'
+
+    def test_04_profile_change_keeps_token(self, user):
+        client = token_client(user)
+        response = client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новая биография'},
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Новая биография'
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+    def test_05_deleted_user(self, admin, user):
+        client = token_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        response = token_client(admin).delete(
+            f'/api/v1/users/{user.username}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_06_review_author(self, user):
+        title = create_catalog(1)[0]
+        response = token_client(user).post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Отзыв', 'score': 7}, format='json',
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
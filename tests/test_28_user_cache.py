@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import LocalTTLCache
+from tests.test_27_stateless_jwt import token_client
+
+
+class Loader:
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        return [key, self.calls]
+
+
+def test_01_local_ttl_cache(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('api.cache.time.monotonic', lambda: now[0])
+    cache = LocalTTLCache(max_size=2, ttl=10)
+    load = Loader()
+    value = cache.get('a', load)
+    value.append('изменено')
+    assert cache.get('a', load) == ['a', 1], (
+        'Проверьте, что кэш отдаёт копии и не перечитывает свежие записи.'
+    )
+    now[0] += 11
+    assert cache.get('a', load) == ['a', 2], (
+        'Проверьте, что запись перечитывается после истечения ttl.'
+    )
+    cache.get('b', load)
+    cache.get('c', load)
+    assert cache.get('a', load) == ['a', 5], (
+        'Проверьте, что размер кэша ограничен max_size.'
+    )
+    cache.invalidate('a')
+    assert cache.get('a', load) == ['a', 6]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28UserCache:
+
+    def test_02_legacy_token(self, admin_client, admin):
+        url = '/api/v1/cache/stats/'
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 0, (
+            'Проверьте, что аутентификация берёт пользователя из кэша.'
+        )
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что сохранение пользователя сбрасывает кэш.'
+        )
+
+    def test_03_myself(self, user):
+        client = token_client(user)
+        client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 0
+        response = client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новая биография'},
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Новая биография'
+
+    def test_04_deleted_user(self, admin_client, user_client, user):
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
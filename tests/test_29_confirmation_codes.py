@@ -0,0 +1,92 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import OutboxEmail, User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+DATA = {'username': 'code_user', 'email': 'code_user@yamdb.fake'}
+
+
+def user_updates(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('UPDATE "reviews_user"')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29ConfirmationCodes:
+
+    def test_01_short_hashed_code(self, client, settings):
+        response = client.post(SIGNUP_URL, data=DATA)
+        assert response.status_code == HTTPStatus.OK
+        code = mail.outbox[-1].body
+        assert len(code) == settings.LENGTH_CONF_CODE
+        user = User.objects.get(username=DATA['username'])
+        assert code not in user.confirmation_code, (
+            'Проверьте, что в базе хранится хэш кода, а не сам код.'
+        )
+        assert user.confirmation_code_expires > timezone.now()
+        assert OutboxEmail.objects.get().body == '', (
+            'Проверьте, что отправленное письмо не хранит код в базе.'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(TOKEN_URL, data={
+                'username': DATA['username'],
+                'confirmation_code': code.lower(),
+            })
+        assert response.status_code == HTTPStatus.CREATED
+        assert 'token' in response.json()
+        assert len(queries) == 1, (
+            'Проверьте, что проверка кода стоит одного запроса.'
+        )
+
+    def test_02_repeated_signup(self, client):
+        client.post(SIGNUP_URL, data=DATA)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(SIGNUP_URL, data=DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert user_updates(queries) == [], (
+            'Проверьте, что повторная регистрация не перезаписывает '
+            'пользователя, пока код действует.'
+        )
+        assert len(mail.outbox) == 2
+        assert mail.outbox[0].body == mail.outbox[1].body, (
+            'Проверьте, что повторная регистрация присылает тот же код.'
+        )
+
+    def test_03_expired_code(self, client):
+        client.post(SIGNUP_URL, data=DATA)
+        old_code = mail.outbox[-1].body
+        User.objects.filter(username=DATA['username']).update(
+            confirmation_code_expires=timezone.now() - timedelta(seconds=1)
+        )
+        response = client.post(TOKEN_URL, data={
+            'username': DATA['username'], 'confirmation_code': old_code,
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что просроченный код не принимается.'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            client.post(SIGNUP_URL, data=DATA)
+        updates = user_updates(queries)
+        assert len(updates) == 1
+        assert 'SET "confirmation_code" = ' in updates[0]
+        assert '"email"' not in updates[0], (
+            'Проверьте, что новый код записывается с update_fields.'
+        )
+        assert User.objects.get(
+            username=DATA['username']
+        ).confirmation_code_expires > timezone.now()
+        new_code = mail.outbox[-1].body
+        response = client.post(TOKEN_URL, data={
+            'username': DATA['username'], 'confirmation_code': new_code,
+        })
+        assert response.status_code == HTTPStatus.CREATED